@@ -0,0 +1,168 @@
+"""
+Seeded synthetic dataset for search benchmarks: users, their provider
+profiles and locations clustered around real city centroids, with
+categories and services drawn from services2.json. The same seed and
+size always produce the same rows.
+"""
+
+import math
+import uuid
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from src.models import service_provider_model
+from src.root import catalog
+
+# (name, latitude, longitude, relative weight, spread in km)
+CITIES = (
+    ("Lagos", 6.5244, 3.3792, 10.0, 18.0),
+    ("Kano", 12.0022, 8.5920, 4.0, 10.0),
+    ("Ibadan", 7.3775, 3.9470, 3.5, 10.0),
+    ("Abuja", 9.0765, 7.3986, 3.0, 12.0),
+    ("Port Harcourt", 4.8156, 7.0498, 2.5, 9.0),
+    ("Benin City", 6.3350, 5.6037, 1.5, 7.0),
+    ("Enugu", 6.4584, 7.5464, 1.0, 6.0),
+    ("Accra", 5.6037, -0.1870, 2.5, 12.0),
+    ("Kumasi", 6.6885, -1.6244, 1.2, 8.0),
+    ("Nairobi", -1.2921, 36.8219, 3.0, 14.0),
+    ("Johannesburg", -26.2041, 28.0473, 3.0, 20.0),
+    ("London", 51.5074, -0.1278, 4.0, 20.0),
+)
+KM_PER_DEGREE = 111.32
+UNLOCATED_SHARE = 0.02
+VERIFIED_SHARE = 0.3
+OPENING_HOURS = {
+    day: {"open": "09:00", "close": "17:00"}
+    for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+} | {"Saturday": {"open": "10:00", "close": "14:00"}}
+
+
+@dataclass(slots=True)
+class GeneratedChunk:
+    user_rows: list[tuple]
+    providers: list[service_provider_model.BulkProviderRecord]
+
+
+class PointSampler:
+    """
+    Draws points around the city centroids, weighted by city size, with a
+    gaussian spread per city.
+    """
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        weights = np.array([city[3] for city in CITIES])
+        self.probabilities = weights / weights.sum()
+
+    def sample(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        cities = self.rng.choice(len(CITIES), size=size, p=self.probabilities)
+        latitudes = np.array([CITIES[city][1] for city in cities])
+        longitudes = np.array([CITIES[city][2] for city in cities])
+        spreads = np.array([CITIES[city][4] for city in cities]) / KM_PER_DEGREE
+        latitudes = latitudes + self.rng.normal(0.0, 1.0, size) * spreads
+        longitudes = longitudes + self.rng.normal(0.0, 1.0, size) * spreads / np.cos(
+            np.radians(latitudes)
+        )
+        return np.clip(latitudes, -89.9, 89.9), (longitudes + 180.0) % 360.0 - 180.0
+
+
+def random_categories(rng: np.random.Generator, count: int = 2) -> list[str]:
+    categories = catalog.load_catalog()
+    picked = rng.choice(len(categories), size=rng.integers(1, count + 1), replace=False)
+    return [categories[index]["category"] for index in picked]
+
+
+def _services_for(rng: np.random.Generator, categories: list[str]) -> list[dict]:
+    by_name = {category["category"]: category for category in catalog.load_catalog()}
+    services = []
+    for name in categories:
+        offered = by_name[name]["services"]
+        for index in rng.choice(len(offered), size=min(4, len(offered)), replace=False):
+            services.append(
+                {
+                    "id": offered[index]["id"],
+                    "name": offered[index]["name"],
+                    "price": int(rng.integers(10, 500)) * 100,
+                }
+            )
+    return services
+
+
+def generate(size: int, seed: int, chunk_size: int = 5000) -> Iterator[GeneratedChunk]:
+    rng = np.random.default_rng(seed)
+    # uuids come from the seeded generator too, so reruns are identical
+    id_bytes = np.random.default_rng(seed + 1)
+    sampler = PointSampler(rng)
+
+    for start in range(0, size, chunk_size):
+        count = min(chunk_size, size - start)
+        latitudes, longitudes = sampler.sample(count)
+        located = rng.random(count) >= UNLOCATED_SHARE
+        verified = rng.random(count) < VERIFIED_SHARE
+        user_rows, providers = [], []
+        for offset in range(count):
+            number = start + offset
+            user_id = uuid.UUID(bytes=id_bytes.bytes(16), version=4)
+            provider_id = uuid.UUID(bytes=id_bytes.bytes(16), version=4)
+            categories = random_categories(rng)
+            user_rows.append(
+                (
+                    user_id,
+                    "Bench",
+                    f"Provider {number}",
+                    f"bench-provider-{number}@example.com",
+                    "user",
+                    "SERVICE PROVIDER",
+                    True,
+                )
+            )
+            providers.append(
+                service_provider_model.BulkProviderRecord(
+                    id=provider_id,
+                    user_id=user_id,
+                    name=f"{categories[0]} Pro {number}",
+                    bio=f"Reliable {' and '.join(categories).lower()} services",
+                    category=categories,
+                    tags=[category.lower() for category in categories],
+                    opening_hours=OPENING_HOURS,
+                    services_provided=_services_for(rng, categories),
+                    verified=bool(verified[offset]),
+                    latitude=float(latitudes[offset]) if located[offset] else None,
+                    longitude=float(longitudes[offset]) if located[offset] else None,
+                )
+            )
+        yield GeneratedChunk(user_rows=user_rows, providers=providers)
+
+
+def sample_queries(
+    count: int, seed: int, radius: int, limit: int = 20
+) -> list[service_provider_model.SearchServices]:
+    """
+    Search requests shaped like real traffic: mostly from inside a city,
+    some from wherever, each asking for one or two categories.
+    """
+    rng = np.random.default_rng(seed)
+    latitudes, longitudes = PointSampler(rng).sample(count)
+    # a fifth of the searches come from outside the clusters
+    stray = rng.random(count) < 0.2
+    latitudes[stray] = rng.uniform(-30.0, 55.0, int(stray.sum()))
+    longitudes[stray] = rng.uniform(-10.0, 40.0, int(stray.sum()))
+    return [
+        service_provider_model.SearchServices(
+            coordinates=service_provider_model.LocationCoordinates(
+                latitude=float(latitude), longitude=float(longitude)
+            ),
+            category=random_categories(rng),
+            radius=radius,
+            limit=limit,
+        )
+        for latitude, longitude in zip(latitudes, longitudes)
+    ]
+
+
+def expected_density(size: int, radius: int) -> float:
+    # rough providers-per-search figure for the report header
+    area = sum(math.pi * (city[4] * 2) ** 2 for city in CITIES)
+    return size * math.pi * (radius / 1000) ** 2 / area
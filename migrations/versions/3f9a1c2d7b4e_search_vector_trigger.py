@@ -0,0 +1,79 @@
+"""search vector trigger
+
+Revision ID: 3f9a1c2d7b4e
+Revises:
+Create Date: 2026-10-18 13:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2d7b4e"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# a trigger rather than the handlers, so COPY imports and direct updates
+# keep the document current too
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION service_providers_search_vector() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector(
+            'english', coalesce(array_to_string(NEW.category, ' '), '')
+        ), 'B')
+        || setweight(to_tsvector(
+            'english', coalesce(array_to_string(NEW.tags, ' '), '')
+        ), 'B')
+        || setweight(to_tsvector(
+            'english',
+            coalesce(
+                jsonb_path_query_array(
+                    NEW.services_provided, 'strict $.**.name'
+                )::text,
+                ''
+            )
+        ), 'B')
+        || setweight(to_tsvector('english', coalesce(NEW.bio, '')), 'C');
+    RETURN NEW;
+END
+$$
+"""
+SEARCH_VECTOR_TRIGGER = """
+CREATE TRIGGER service_providers_search_vector
+BEFORE INSERT OR UPDATE OF name, bio, category, tags, services_provided
+ON service_providers
+FOR EACH ROW EXECUTE FUNCTION service_providers_search_vector()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # databases created by create_all before the column existed lack it
+    op.execute(
+        "ALTER TABLE service_providers ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_service_search_vector "
+        "ON service_providers USING gin (search_vector)"
+    )
+    op.execute(SEARCH_VECTOR_FUNCTION)
+    op.execute(
+        "DROP TRIGGER IF EXISTS service_providers_search_vector ON service_providers"
+    )
+    op.execute(SEARCH_VECTOR_TRIGGER)
+    # touching a watched column makes the trigger fill in older rows
+    op.execute("UPDATE service_providers SET name = name WHERE search_vector IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DROP TRIGGER IF EXISTS service_providers_search_vector ON service_providers"
+    )
+    op.execute("DROP FUNCTION IF EXISTS service_providers_search_vector()")
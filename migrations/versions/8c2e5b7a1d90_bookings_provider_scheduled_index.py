@@ -0,0 +1,41 @@
+"""bookings provider scheduled index
+
+Revision ID: 8c2e5b7a1d90
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e5b7a1d90"
+down_revision: Union[str, None] = "3f9a1c2d7b4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # concurrently, so bookings stay writable while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_bookings_provider_scheduled",
+            "bookings",
+            ["service_provider_id", "scheduled_date"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_bookings_provider_scheduled",
+            table_name="bookings",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
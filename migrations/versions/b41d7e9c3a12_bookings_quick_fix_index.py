@@ -0,0 +1,43 @@
+"""bookings quick fix index
+
+Revision ID: b41d7e9c3a12
+Revises: 8c2e5b7a1d90
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b41d7e9c3a12"
+down_revision: Union[str, None] = "8c2e5b7a1d90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # concurrently, so bookings stay writable while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_bookings_quick_fix_status_created",
+            "bookings",
+            ["status", "date_created"],
+            postgresql_where=sa.text("quick_fix"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_bookings_quick_fix_status_created",
+            table_name="bookings",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
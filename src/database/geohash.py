@@ -0,0 +1,146 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_METERS = 6371008.8
+
+
+def _bits(precision: int) -> tuple[int, int]:
+    # geohash interleaves starting with longitude, so longitude gets the odd bit
+    total = precision * 5
+    return total - total // 2, total // 2
+
+
+def _cell_index(latitude: float, longitude: float, precision: int) -> tuple[int, int]:
+    lon_bits, lat_bits = _bits(precision)
+    lat_index = int((latitude + 90.0) / 180.0 * (1 << lat_bits))
+    lon_index = int((longitude + 180.0) / 360.0 * (1 << lon_bits))
+    return (
+        min(max(lat_index, 0), (1 << lat_bits) - 1),
+        min(max(lon_index, 0), (1 << lon_bits) - 1),
+    )
+
+
+def _encode_index(lat_index: int, lon_index: int, precision: int) -> str:
+    lon_bits, lat_bits = _bits(precision)
+    value = 0
+    for bit in range(precision * 5):
+        if bit % 2 == 0:
+            lon_bits -= 1
+            value = (value << 1) | ((lon_index >> lon_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((lat_index >> lat_bits) & 1)
+
+    chars = []
+    for shift in range((precision - 1) * 5, -1, -5):
+        chars.append(BASE32[(value >> shift) & 31])
+    return "".join(chars)
+
+
+def encode(latitude: float, longitude: float, precision: int) -> str:
+    lat_index, lon_index = _cell_index(latitude, longitude, precision)
+    return _encode_index(lat_index, lon_index, precision)
+
+
+def haversine_meters(
+    latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float
+) -> float:
+    phi_1 = math.radians(latitude_1)
+    phi_2 = math.radians(latitude_2)
+    d_phi = phi_2 - phi_1
+    d_lambda = math.radians(longitude_2 - longitude_1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi_1) * math.cos(phi_2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _index_ranges(
+    latitude: float, longitude: float, radius: float, precision: int
+) -> tuple[range, list[int]]:
+    lon_bits, lat_bits = _bits(precision)
+    lat_delta = math.degrees(radius / EARTH_RADIUS_METERS)
+    lat_low = max(latitude - lat_delta, -90.0)
+    lat_high = min(latitude + lat_delta, 90.0)
+
+    lowest_lat, _ = _cell_index(lat_low, longitude, precision)
+    highest_lat, _ = _cell_index(lat_high, longitude, precision)
+    lat_range = range(lowest_lat, highest_lat + 1)
+
+    # widest longitude span of the box is at the latitude closest to a pole
+    widest = max(abs(lat_low), abs(lat_high))
+    cos_lat = math.cos(math.radians(widest))
+    lon_cells = 1 << lon_bits
+    if cos_lat <= 1e-9:
+        return lat_range, list(range(lon_cells))
+
+    lon_delta = math.degrees(radius / (EARTH_RADIUS_METERS * cos_lat))
+    if lon_delta >= 180.0:
+        return lat_range, list(range(lon_cells))
+
+    cell_width = 360.0 / lon_cells
+    start = math.floor((longitude - lon_delta + 180.0) / cell_width)
+    stop = math.floor((longitude + lon_delta + 180.0) / cell_width)
+    # wrap around the antimeridian
+    return lat_range, sorted({index % lon_cells for index in range(start, stop + 1)})
+
+
+def count_cells_in_radius(
+    latitude: float, longitude: float, radius: float, precision: int
+) -> int:
+    lat_range, lon_indexes = _index_ranges(latitude, longitude, radius, precision)
+    return len(lat_range) * len(lon_indexes)
+
+
+def cells_in_radius(
+    latitude: float, longitude: float, radius: float, precision: int
+) -> list[str]:
+    """
+    Returns every geohash cell at `precision` that intersects the bounding
+    box of a circle of `radius` meters around the point.
+    """
+    lat_range, lon_indexes = _index_ranges(latitude, longitude, radius, precision)
+    return [
+        _encode_index(lat_index, lon_index, precision)
+        for lat_index in lat_range
+        for lon_index in lon_indexes
+    ]
+
+
+def cell_rings(latitude: float, longitude: float, radius: float, precision: int):
+    """
+    Yields (covered_distance, cells) for square rings of cells around the
+    point's cell, nearest first. Every cell yielded later is at least
+    `covered_distance` meters away, so a caller can stop as soon as it has
+    enough matches closer than that.
+    """
+    lon_bits, lat_bits = _bits(precision)
+    lat_cells, lon_cells = 1 << lat_bits, 1 << lon_bits
+    center_lat, center_lon = _cell_index(latitude, longitude, precision)
+
+    lat_delta = math.degrees(radius / EARTH_RADIUS_METERS)
+    widest = min(max(abs(latitude - lat_delta), abs(latitude + lat_delta)), 90.0)
+    meters_per_degree = math.radians(EARTH_RADIUS_METERS)
+    cell_height = 180.0 / lat_cells * meters_per_degree
+    cell_width = 360.0 / lon_cells * meters_per_degree * math.cos(math.radians(widest))
+    step = min(cell_height, cell_width)
+    if step <= 0:
+        return
+
+    ring = 0
+    while True:
+        cells = set()
+        for lat_index in range(center_lat - ring, center_lat + ring + 1):
+            if not 0 <= lat_index < lat_cells:
+                continue
+            on_edge = abs(lat_index - center_lat) == ring
+            lon_offsets = range(-ring, ring + 1) if on_edge else (-ring, ring)
+            for lon_offset in lon_offsets:
+                lon_index = (center_lon + lon_offset) % lon_cells
+                cells.add(_encode_index(lat_index, lon_index, precision))
+        covered_distance = ring * step
+        yield covered_distance, cells
+        if covered_distance > radius or 2 * ring + 1 >= max(lat_cells, lon_cells):
+            return
+        ring += 1
@@ -1,9 +1,10 @@
 import uuid
+from datetime import datetime, timedelta
 from uuid import UUID
 from src.root.database import db_dependency
 from src.models import bookings_model
 from src.database.orms import user_orm
-from sqlalchemy import select, update, delete
+from sqlalchemy import bindparam, func, or_, select, update, delete
 from src.custom_exceptions import error
 from src.models import orm_models
 from sqlalchemy.orm import joinedload
@@ -162,3 +163,138 @@ async def delete_bookings_by_id(db_conn: db_dependency, service_id: UUID):
         return None
     else:
         raise error.NotFoundError
+
+
+async def get_provider_booked_intervals(
+    db_conn: db_dependency,
+    service_provider_id: UUID,
+    start: datetime,
+    end: datetime,
+    max_duration: timedelta,
+):
+    # only the window being asked about, widened by the longest booking so
+    # one that started just before `start` still counts
+    query = (
+        select(
+            user_orm.BookingsTable.scheduled_date,
+            user_orm.BookingsTable.duration_minutes,
+        )
+        .where(
+            user_orm.BookingsTable.service_provider_id == service_provider_id,
+            user_orm.BookingsTable.scheduled_date >= start - max_duration,
+            user_orm.BookingsTable.scheduled_date < end,
+            or_(
+                user_orm.BookingsTable.status.is_(None),
+                user_orm.BookingsTable.status.not_in(
+                    [
+                        bookings_model.BookingStatus.REJECTED,
+                        bookings_model.BookingStatus.CANCELLED,
+                    ]
+                ),
+            ),
+        )
+        .order_by(user_orm.BookingsTable.scheduled_date)
+    )
+    result = await db_conn.execute(query)
+    return result.all()
+
+
+async def lock_pending_quick_fix_bookings(db_conn: db_dependency, limit: int):
+    # SKIP LOCKED lets every worker dispatch a disjoint batch; the locks
+    # are held until the caller commits its offers
+    query = (
+        select(
+            user_orm.BookingsTable.id,
+            user_orm.BookingsTable.address,
+            user_orm.BookingsTable.services_requested,
+        )
+        .where(
+            user_orm.BookingsTable.quick_fix.is_(True),
+            user_orm.BookingsTable.service_provider_id.is_(None),
+            user_orm.BookingsTable.status == bookings_model.BookingStatus.PENDING,
+        )
+        .order_by(user_orm.BookingsTable.date_created)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db_conn.execute(query)
+    return result.all()
+
+
+async def get_offered_provider_ids(db_conn: db_dependency):
+    query = select(user_orm.BookingsTable.service_provider_id).where(
+        user_orm.BookingsTable.status == bookings_model.BookingStatus.OFFERED
+    )
+    result = await db_conn.execute(query)
+    return set(result.scalars().all())
+
+
+async def offer_bookings(db_conn: db_dependency, offers: dict[UUID, UUID]):
+    if not offers:
+        return
+    table = user_orm.BookingsTable.__table__
+    await db_conn.execute(
+        update(table)
+        .where(table.c.id == bindparam("booking_id"))
+        .values(
+            service_provider_id=bindparam("provider_id"),
+            status=bookings_model.BookingStatus.OFFERED,
+        ),
+        [
+            {"booking_id": booking_id, "provider_id": provider_id}
+            for booking_id, provider_id in offers.items()
+        ],
+    )
+
+
+async def get_quick_fix_offers(db_conn: db_dependency, service_provider_id: UUID):
+    query = (
+        select(user_orm.BookingsTable)
+        .where(
+            user_orm.BookingsTable.service_provider_id == service_provider_id,
+            user_orm.BookingsTable.quick_fix.is_(True),
+            user_orm.BookingsTable.status == bookings_model.BookingStatus.OFFERED,
+        )
+        .order_by(user_orm.BookingsTable.last_updated)
+    )
+    result = await db_conn.execute(query)
+    return result.scalars().all()
+
+
+async def expire_quick_fix_offers(db_conn: db_dependency, offered_before: datetime):
+    # returns (booking_id, provider_id) of the offers sent back to PENDING
+    query = (
+        select(user_orm.BookingsTable.id, user_orm.BookingsTable.service_provider_id)
+        .where(
+            user_orm.BookingsTable.quick_fix.is_(True),
+            user_orm.BookingsTable.status == bookings_model.BookingStatus.OFFERED,
+            user_orm.BookingsTable.last_updated < offered_before,
+        )
+        .with_for_update(skip_locked=True)
+    )
+    expired = (await db_conn.execute(query)).all()
+    if expired:
+        await db_conn.execute(
+            update(user_orm.BookingsTable)
+            .where(user_orm.BookingsTable.id.in_([row.id for row in expired]))
+            .values(
+                service_provider_id=None,
+                status=bookings_model.BookingStatus.PENDING,
+            )
+        )
+    return [(booking_id, provider_id) for booking_id, provider_id in expired]
+
+
+async def count_recent_bookings(
+    db_conn: db_dependency, service_provider_ids: list[UUID], since: datetime
+) -> dict[UUID, int]:
+    query = (
+        select(user_orm.BookingsTable.service_provider_id, func.count())
+        .where(
+            user_orm.BookingsTable.service_provider_id.in_(service_provider_ids),
+            user_orm.BookingsTable.date_created >= since,
+        )
+        .group_by(user_orm.BookingsTable.service_provider_id)
+    )
+    result = await db_conn.execute(query)
+    return dict(result.all())
@@ -0,0 +1,88 @@
+from uuid import UUID
+
+from asyncpg import Connection
+
+PROVIDER_COLUMNS = (
+    "id",
+    "user_id",
+    "name",
+    "bio",
+    "category",
+    "category_ids",
+    "tags",
+    "zip_code",
+    "opening_hours",
+    "services_provided",
+    "address",
+    "is_active",
+    "verified",
+    "online_status",
+)
+
+STAGED_LOCATION_COLUMNS = (
+    "id",
+    "service_provider_id",
+    "longitude",
+    "latitude",
+    "point_wkb",
+)
+
+
+async def missing_user_ids(conn: Connection, user_ids: set[UUID]) -> set[UUID]:
+    # checked before the COPY so one bad reference does not sink the chunk
+    rows = await conn.fetch(
+        """
+        SELECT user_id FROM unnest($1::uuid[]) AS user_id
+        WHERE NOT EXISTS (SELECT 1 FROM users WHERE users.id = user_id)
+        """,
+        list(user_ids),
+    )
+    return {row["user_id"] for row in rows}
+
+
+async def copy_providers_and_locations(
+    conn: Connection, provider_rows: list[tuple], location_rows: list[tuple]
+):
+    """
+    Loads one chunk in a single transaction. Providers are copied straight
+    into service_providers; locations go through a temp table because the
+    points arrive as EWKB and postgis has no binary COPY codec in asyncpg.
+    """
+    async with conn.transaction():
+        await conn.copy_records_to_table(
+            "service_providers", records=provider_rows, columns=PROVIDER_COLUMNS
+        )
+        if not location_rows:
+            return
+        await conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_locations (
+                id uuid,
+                service_provider_id uuid,
+                longitude double precision,
+                latitude double precision,
+                point_wkb bytea
+            ) ON COMMIT DELETE ROWS
+            """)
+        await conn.copy_records_to_table(
+            "import_locations",
+            records=location_rows,
+            columns=STAGED_LOCATION_COLUMNS,
+        )
+        await conn.execute("""
+            INSERT INTO locations (
+                id,
+                service_provider_id,
+                longitude,
+                latitude,
+                coordinates,
+                geography_coordinates
+            )
+            SELECT
+                id,
+                service_provider_id,
+                longitude,
+                latitude,
+                ST_GeomFromEWKB(point_wkb),
+                ST_GeomFromEWKB(point_wkb)::geography
+            FROM import_locations
+            """)
@@ -0,0 +1,234 @@
+from uuid import UUID
+from src.root.database import db_dependency
+from src.database.orms import user_orm
+from sqlalchemy import func, insert, select, text, update
+from src.custom_exceptions import error
+
+CATEGORY = "category"
+SERVICE = "service"
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+async def _lock_catalog(db_conn: db_dependency):
+    # versions and codes are handed out in order, one writer at a time
+    await db_conn.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext('catalog_changes'))")
+    )
+
+
+async def _record_change(
+    db_conn: db_dependency, entity_type: str, entity_id: UUID | None, action: str
+) -> int:
+    result = await db_conn.execute(
+        insert(user_orm.CatalogChangeTable)
+        .values(entity_type=entity_type, entity_id=entity_id, action=action)
+        .returning(user_orm.CatalogChangeTable.version)
+    )
+    return result.scalar_one()
+
+
+async def get_catalog_version(db_conn: db_dependency) -> int:
+    result = await db_conn.execute(
+        select(func.coalesce(func.max(user_orm.CatalogChangeTable.version), 0))
+    )
+    return result.scalar_one()
+
+
+async def seed_catalog(db_conn: db_dependency, categories: list[dict]) -> int:
+    """
+    Loads the catalog file into empty catalog tables as a single version.
+    Codes follow file order, matching the codes already derived from it.
+    Returns the catalog version, seeded or not.
+    """
+    await _lock_catalog(db_conn)
+    version = await get_catalog_version(db_conn)
+    if version:
+        await db_conn.commit()
+        return version
+
+    version = await _record_change(db_conn, "catalog", None, "seed")
+    await db_conn.execute(
+        insert(user_orm.CatalogCategoryTable),
+        [
+            {
+                "id": UUID(category["id"]),
+                "name": category["category"],
+                "code": code,
+                "version": version,
+            }
+            for code, category in enumerate(categories, start=1)
+        ],
+    )
+    await db_conn.execute(
+        insert(user_orm.CatalogServiceTable),
+        [
+            {
+                "id": UUID(service["id"]),
+                "category_id": UUID(category["id"]),
+                "name": service["name"],
+                "version": version,
+            }
+            for category in categories
+            for service in category["services"]
+        ],
+    )
+    await db_conn.commit()
+    return version
+
+
+async def get_catalog(db_conn: db_dependency) -> list[dict]:
+    # live catalog in the services2.json shape, plus each category's code
+    categories = await db_conn.execute(
+        select(
+            user_orm.CatalogCategoryTable.id,
+            user_orm.CatalogCategoryTable.name,
+            user_orm.CatalogCategoryTable.code,
+        )
+        .where(user_orm.CatalogCategoryTable.deleted.is_(False))
+        .order_by(user_orm.CatalogCategoryTable.code)
+    )
+    catalog = {
+        category_id: {
+            "id": str(category_id),
+            "category": name,
+            "code": code,
+            "services": [],
+        }
+        for category_id, name, code in categories.all()
+    }
+    services = await db_conn.execute(
+        select(
+            user_orm.CatalogServiceTable.id,
+            user_orm.CatalogServiceTable.category_id,
+            user_orm.CatalogServiceTable.name,
+        )
+        .where(user_orm.CatalogServiceTable.deleted.is_(False))
+        .order_by(
+            user_orm.CatalogServiceTable.date_created, user_orm.CatalogServiceTable.id
+        )
+    )
+    for service_id, category_id, name in services.all():
+        if category_id in catalog:
+            catalog[category_id]["services"].append(
+                {"id": str(service_id), "name": name}
+            )
+    return list(catalog.values())
+
+
+async def get_catalog_changes(db_conn: db_dependency, since_version: int):
+    """
+    Categories and services changed after `since_version`, deleted ones
+    included, as (categories, services) row lists.
+    """
+    categories = await db_conn.execute(
+        select(
+            user_orm.CatalogCategoryTable.id,
+            user_orm.CatalogCategoryTable.name,
+            user_orm.CatalogCategoryTable.deleted,
+        ).where(user_orm.CatalogCategoryTable.version > since_version)
+    )
+    services = await db_conn.execute(
+        select(
+            user_orm.CatalogServiceTable.id,
+            user_orm.CatalogServiceTable.category_id,
+            user_orm.CatalogServiceTable.name,
+            user_orm.CatalogServiceTable.deleted,
+        ).where(user_orm.CatalogServiceTable.version > since_version)
+    )
+    return categories.all(), services.all()
+
+
+async def upsert_category(db_conn: db_dependency, category_id: UUID, name: str) -> int:
+    await _lock_catalog(db_conn)
+    version = await _record_change(db_conn, CATEGORY, category_id, UPSERT)
+    result = await db_conn.execute(
+        update(user_orm.CatalogCategoryTable)
+        .where(user_orm.CatalogCategoryTable.id == category_id)
+        .values(name=name, version=version, deleted=False)
+    )
+    if not result.rowcount:
+        # new categories append a code; codes of removed ones stay taken
+        next_code = select(
+            func.coalesce(func.max(user_orm.CatalogCategoryTable.code), 0) + 1
+        ).scalar_subquery()
+        await db_conn.execute(
+            insert(user_orm.CatalogCategoryTable).values(
+                id=category_id, name=name, code=next_code, version=version
+            )
+        )
+    await db_conn.commit()
+    return version
+
+
+async def delete_category(db_conn: db_dependency, category_id: UUID) -> int:
+    await _lock_catalog(db_conn)
+    version = await _record_change(db_conn, CATEGORY, category_id, DELETE)
+    result = await db_conn.execute(
+        update(user_orm.CatalogCategoryTable)
+        .where(
+            user_orm.CatalogCategoryTable.id == category_id,
+            user_orm.CatalogCategoryTable.deleted.is_(False),
+        )
+        .values(deleted=True, version=version)
+    )
+    if not result.rowcount:
+        await db_conn.rollback()
+        raise error.NotFoundError
+    await db_conn.execute(
+        update(user_orm.CatalogServiceTable)
+        .where(
+            user_orm.CatalogServiceTable.category_id == category_id,
+            user_orm.CatalogServiceTable.deleted.is_(False),
+        )
+        .values(deleted=True, version=version)
+    )
+    await db_conn.commit()
+    return version
+
+
+async def upsert_service(
+    db_conn: db_dependency, service_id: UUID, category_id: UUID, name: str
+) -> int:
+    await _lock_catalog(db_conn)
+    category = await db_conn.execute(
+        select(user_orm.CatalogCategoryTable.id).where(
+            user_orm.CatalogCategoryTable.id == category_id,
+            user_orm.CatalogCategoryTable.deleted.is_(False),
+        )
+    )
+    if category.scalar_one_or_none() is None:
+        await db_conn.rollback()
+        raise error.NotFoundError
+    version = await _record_change(db_conn, SERVICE, service_id, UPSERT)
+    result = await db_conn.execute(
+        update(user_orm.CatalogServiceTable)
+        .where(user_orm.CatalogServiceTable.id == service_id)
+        .values(category_id=category_id, name=name, version=version, deleted=False)
+    )
+    if not result.rowcount:
+        await db_conn.execute(
+            insert(user_orm.CatalogServiceTable).values(
+                id=service_id, category_id=category_id, name=name, version=version
+            )
+        )
+    await db_conn.commit()
+    return version
+
+
+async def delete_service(db_conn: db_dependency, service_id: UUID) -> int:
+    await _lock_catalog(db_conn)
+    version = await _record_change(db_conn, SERVICE, service_id, DELETE)
+    result = await db_conn.execute(
+        update(user_orm.CatalogServiceTable)
+        .where(
+            user_orm.CatalogServiceTable.id == service_id,
+            user_orm.CatalogServiceTable.deleted.is_(False),
+        )
+        .values(deleted=True, version=version)
+    )
+    if not result.rowcount:
+        await db_conn.rollback()
+        raise error.NotFoundError
+    await db_conn.commit()
+    return version
@@ -3,112 +3,492 @@ from uuid import UUID
 from src.root.database import db_dependency
 from src.models import service_provider_model
 from src.database.orms import user_orm
-from sqlalchemy import select, update, delete
+from src.database import search_cache, search_index, search_index_sync
+from sqlalchemy import (
+    and_,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    literal,
+    literal_column,
+    not_,
+    or_,
+    select,
+    tuple_,
+    union_all,
+    update,
+    Float,
+)
+from sqlalchemy.orm import aliased
 from src.custom_exceptions import error
 from src.models import orm_models
+from src.root import catalog
+from geoalchemy2 import Geography
 from geoalchemy2.shape import from_shape
 from shapely.geometry import Point
 
+# sorts category-only matches without a location after every measured one
+UNKNOWN_DISTANCE = float("inf")
+# text search configuration used by the service_providers_search_vector trigger
+SEARCH_LANGUAGE = "english"
+
 
 async def create_service_provider_location(
     db_conn: db_dependency, services: service_provider_model.CreateLocation
 ):
+    point = from_shape(
+        Point(services.coordinates.longitude, services.coordinates.latitude),
+        srid=4326,
+    )
     new_service = user_orm.LocationTable(
         id=uuid.uuid4(),
         service_provider_id=services.service_provider_id,
-        coordinates=from_shape(
-            Point(services.coordinates.longitude, services.coordinates.latitude),
-            srid=4326,
-        ),
+        coordinates=point,
+        geography_coordinates=point,
         longitude=services.coordinates.longitude,
         latitude=services.coordinates.latitude,
     )
     db_conn.add(new_service)
     await db_conn.commit()
     await db_conn.refresh(new_service)
+    indexed = search_index.provider_index.get(services.service_provider_id)
+    previous_location = (
+        (indexed.latitude, indexed.longitude)
+        if indexed is not None and indexed.latitude is not None
+        else None
+    )
+    await search_index_sync.upsert_location(
+        provider_id=services.service_provider_id,
+        latitude=services.coordinates.latitude,
+        longitude=services.coordinates.longitude,
+    )
+    await search_cache.invalidate_provider(
+        services.service_provider_id, previous_location=previous_location
+    )
 
     return orm_models.LocationTableModel.model_validate(new_service)
 
 
-async def search_service_providers_by_radius(
+async def get_provider_index_rows(db_conn: db_dependency):
+    # latest location last, so it wins when a provider has several
+    query = (
+        select(
+            user_orm.ServiceProviderTable.id,
+            user_orm.ServiceProviderTable.category,
+            user_orm.ServiceProviderTable.online_status,
+            user_orm.ServiceProviderTable.verified,
+            user_orm.LocationTable.latitude,
+            user_orm.LocationTable.longitude,
+        )
+        .outerjoin(
+            user_orm.LocationTable,
+            user_orm.ServiceProviderTable.id
+            == user_orm.LocationTable.service_provider_id,
+        )
+        .order_by(user_orm.LocationTable.date_created.nulls_first())
+    )
+    result = await db_conn.execute(query)
+    return [tuple(row) for row in result.all()]
+
+
+async def get_online_providers_nearby(
     db_conn: db_dependency,
-    search_query: service_provider_model.SearchServices,
-    search_radius: int = 50000,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    limit: int,
 ):
-    # First query: by location and category
+    search_point = _search_point(
+        service_provider_model.LocationCoordinates(
+            latitude=latitude, longitude=longitude
+        )
+    )
+    distance = user_orm.LocationTable.geography_coordinates.distance_centroid(
+        search_point
+    )
     query = (
-        select(user_orm.ServiceProviderTable)
+        select(user_orm.ServiceProviderTable.id, distance.label("distance"))
         .join(
             user_orm.LocationTable,
             user_orm.ServiceProviderTable.id
             == user_orm.LocationTable.service_provider_id,
         )
         .where(
-            user_orm.LocationTable.coordinates.ST_DWithin(
-                from_shape(
-                    Point(
-                        search_query.coordinates.longitude,
-                        search_query.coordinates.latitude,
-                    ),
-                    srid=4326,
-                ),
-                search_radius,
-            ),
-            user_orm.ServiceProviderTable.category.overlap(search_query.category),
+            user_orm.ServiceProviderTable.online_status.is_(True),
+            _within(search_point, radius),
         )
+        .order_by(distance)
+        .limit(limit)
     )
-
     result = await db_conn.execute(query)
-    service_providers = result.scalars().all()
-
-    if service_providers:
-        for provider in service_providers:
-            print(provider.address)
-        return [
-            orm_models.ServiceProviderTableModel.model_validate(provider)
-            for provider in service_providers
-        ]
+    return [(service_provider_id, distance) for service_provider_id, distance in result]
 
-    # Second query: fallback by category only
-    query = select(user_orm.ServiceProviderTable).where(
-        user_orm.ServiceProviderTable.category.overlap(search_query.category)
+
+async def backfill_geography_coordinates(db_conn: db_dependency):
+    query = (
+        update(user_orm.LocationTable)
+        .where(
+            user_orm.LocationTable.geography_coordinates.is_(None),
+            user_orm.LocationTable.coordinates.is_not(None),
+        )
+        .values(
+            geography_coordinates=cast(
+                user_orm.LocationTable.coordinates,
+                Geography(geometry_type="POINT", srid=4326),
+            )
+        )
     )
     result = await db_conn.execute(query)
-    service_providers = result.scalars().all()
+    await db_conn.commit()
+    return result.rowcount
 
-    if service_providers:
-        return [
-            orm_models.ServiceProviderTableModel.model_validate(provider)
-            for provider in service_providers
-        ]
 
-    # Third query: fallback by location only
-    query = (
-        select(user_orm.ServiceProviderTable)
+def _search_point(coordinates: service_provider_model.LocationCoordinates):
+    return cast(
+        func.ST_SetSRID(
+            func.ST_MakePoint(coordinates.longitude, coordinates.latitude), 4326
+        ),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+
+
+# all distances and radius tests are on the sphere, the metric the in-memory
+# index uses, so a page and its cursor mean the same whichever path served
+# them. On geography `<->` is already the sphere distance, which keeps the
+# KNN order on idx_location_geog.
+def _within(search_point, radius: float):
+    return func.ST_DWithin(
+        user_orm.LocationTable.geography_coordinates, search_point, radius, False
+    )
+
+
+def _distance(search_point):
+    return func.ST_Distance(
+        user_orm.LocationTable.geography_coordinates, search_point, False
+    )
+
+
+def _category_filter(categories: list[str]):
+    # catalog categories match on their codes through idx_service_category_ids;
+    # names outside the catalog fall back to the text array (idx_service_category)
+    codes, unknown = catalog.split_categories(categories)
+    filters = []
+    if codes:
+        filters.append(user_orm.ServiceProviderTable.category_ids.overlap(codes))
+    if unknown:
+        filters.append(user_orm.ServiceProviderTable.category.overlap(unknown))
+    return or_(*filters) if filters else false()
+
+
+def _ranked_branch(
+    match_tier: int,
+    condition,
+    distance,
+    after: tuple[int, float, UUID] | None,
+    limit: int,
+):
+    # each tier is its own KNN-ordered branch so the planner can walk
+    # idx_location_geog instead of sorting every match
+    if after is not None:
+        after_tier, after_distance, after_id = after
+        if match_tier < after_tier:
+            return None
+        if match_tier == after_tier:
+            condition = and_(
+                condition,
+                tuple_(distance, user_orm.ServiceProviderTable.id)
+                > tuple_(literal(after_distance), literal(after_id)),
+                user_orm.ServiceProviderTable.id != after_id,
+            )
+    return (
+        select(
+            user_orm.ServiceProviderTable,
+            literal(match_tier).label("match_tier"),
+            distance.label("distance"),
+        )
         .join(
             user_orm.LocationTable,
             user_orm.ServiceProviderTable.id
             == user_orm.LocationTable.service_provider_id,
         )
-        .where(
-            user_orm.LocationTable.coordinates.ST_DWithin(
-                from_shape(
-                    Point(
-                        search_query.coordinates.longitude,
-                        search_query.coordinates.latitude,
-                    ),
-                    srid=4326,
-                ),
-                search_radius,
+        .where(condition)
+        .order_by(distance, user_orm.ServiceProviderTable.id)
+        .limit(limit)
+    )
+
+
+def _unlocated_branch(
+    match_tier: int,
+    condition,
+    after: tuple[int, float, UUID] | None,
+    limit: int,
+):
+    # providers with no distance to order by sort after every located one
+    # in their tier, by id
+    if after is not None:
+        after_tier, after_distance, after_id = after
+        if match_tier < after_tier:
+            return None
+        if match_tier == after_tier and after_distance == UNKNOWN_DISTANCE:
+            condition = and_(condition, user_orm.ServiceProviderTable.id > after_id)
+    return (
+        select(
+            user_orm.ServiceProviderTable,
+            literal(match_tier).label("match_tier"),
+            literal(UNKNOWN_DISTANCE).label("distance"),
+        )
+        .where(condition)
+        .order_by(user_orm.ServiceProviderTable.id)
+        .limit(limit)
+    )
+
+
+def build_radius_search_query(
+    search_query: service_provider_model.SearchServices,
+    after: tuple[int, float, UUID] | None = None,
+):
+    # tiers: 0 = location and category, 1 = category only, 2 = location only.
+    # keyset is (tier, distance, id); `after` is the last row of the previous
+    # page
+    category_match = func.coalesce(_category_filter(search_query.category), false())
+    if search_query.coordinates is None:
+        branches = [_unlocated_branch(1, category_match, after, search_query.limit)]
+    else:
+        search_point = _search_point(search_query.coordinates)
+        # geography operands: radius and distance are both in meters. Rows
+        # without a geography fail the test either way round and are left
+        # to the unlocated branch.
+        location_match = _within(search_point, search_query.radius)
+        distance = user_orm.LocationTable.geography_coordinates.distance_centroid(
+            search_point
+        )
+        located = (
+            select(user_orm.LocationTable.service_provider_id)
+            .where(
+                user_orm.LocationTable.service_provider_id
+                == user_orm.ServiceProviderTable.id,
+                user_orm.LocationTable.geography_coordinates.is_not(None),
             )
+            .exists()
         )
+        branches = [
+            _ranked_branch(
+                0,
+                and_(location_match, category_match),
+                distance,
+                after,
+                search_query.limit,
+            ),
+            _ranked_branch(
+                1,
+                and_(category_match, not_(location_match)),
+                distance,
+                after,
+                search_query.limit,
+            ),
+            _unlocated_branch(
+                1, and_(category_match, not_(located)), after, search_query.limit
+            ),
+            _ranked_branch(
+                2,
+                and_(location_match, not_(category_match)),
+                distance,
+                after,
+                search_query.limit,
+            ),
+        ]
+    branches = [branch for branch in branches if branch is not None]
+    if not branches:
+        # the cursor is already past the last tier
+        return None
+    ranked = union_all(*branches).subquery()
+    provider = aliased(user_orm.ServiceProviderTable, ranked)
+
+    return (
+        select(provider, ranked.c.match_tier, ranked.c.distance)
+        .order_by(ranked.c.match_tier, ranked.c.distance, ranked.c.id)
+        .limit(search_query.limit)
     )
+
+
+async def search_service_providers_by_radius(
+    db_conn: db_dependency,
+    search_query: service_provider_model.SearchServices,
+    after: tuple[int, float, UUID] | None = None,
+):
+    query = build_radius_search_query(search_query, after=after)
+    if query is None:
+        return []
     result = await db_conn.execute(query)
-    service_providers = result.scalars().all()
 
     return [
-        orm_models.ServiceProviderTableModel.model_validate(provider)
-        for provider in service_providers
+        orm_models.ServiceProviderSearchTableModel.model_validate(
+            {
+                **service_provider.as_dict(),
+                "match_tier": tier,
+                "distance": None if distance == UNKNOWN_DISTANCE else distance,
+            }
+        )
+        for service_provider, tier, distance in result.all()
+    ]
+
+
+# columns counted towards profile completeness in ranked search
+PROFILE_FIELDS = (
+    "bio",
+    "profile_pic",
+    "catalogue_pic",
+    "opening_hours",
+    "services_provided",
+    "tags",
+    "zip_code",
+    "address",
+)
+
+
+async def get_ranking_candidates(
+    db_conn: db_dependency,
+    search_query: service_provider_model.SearchServices,
+    limit: int,
+    pool_radius: float | None = None,
+):
+    """
+    Feature rows (id, match_tier, distance, rating, verified, online_status,
+    completeness) of up to `limit` providers matching the location or the
+    category, best tier and nearest first. With coordinates, category-only
+    candidates are limited to `pool_radius` meters and both branches are
+    KNN-ordered, so the planner walks idx_location_geog instead of sorting
+    every match. Full rows are only loaded for the page that survives
+    ranking.
+    """
+    category_match = func.coalesce(_category_filter(search_query.category), false())
+    completeness = sum(
+        case((getattr(user_orm.ServiceProviderTable, field).is_not(None), 1), else_=0)
+        for field in PROFILE_FIELDS
+    ) / float(len(PROFILE_FIELDS))
+
+    def features(match_tier, distance):
+        return select(
+            user_orm.ServiceProviderTable.id,
+            match_tier.label("match_tier"),
+            distance.label("distance"),
+            user_orm.ServiceProviderTable.rating,
+            user_orm.ServiceProviderTable.verified,
+            user_orm.ServiceProviderTable.online_status,
+            completeness.label("completeness"),
+        )
+
+    if search_query.coordinates is None:
+        query = (
+            features(literal(1), literal(None, Float))
+            .where(category_match)
+            .order_by(user_orm.ServiceProviderTable.id)
+            .limit(limit)
+        )
+        result = await db_conn.execute(query)
+        return result.all()
+
+    search_point = _search_point(search_query.coordinates)
+    location_match = _within(search_point, search_query.radius)
+    distance = user_orm.LocationTable.geography_coordinates.distance_centroid(
+        search_point
+    )
+
+    def nearest(match_tier, condition):
+        return (
+            features(match_tier, distance)
+            .join(
+                user_orm.LocationTable,
+                user_orm.ServiceProviderTable.id
+                == user_orm.LocationTable.service_provider_id,
+            )
+            .where(condition)
+            .order_by(distance, user_orm.ServiceProviderTable.id)
+            .limit(limit)
+        )
+
+    candidates = union_all(
+        # tiers 0 and 2: everything within the radius
+        nearest(case((category_match, 0), else_=2), location_match),
+        # tier 1: category matches between the radius and the pool edge
+        nearest(
+            literal(1),
+            and_(
+                category_match,
+                not_(location_match),
+                _within(search_point, max(pool_radius or 0, search_query.radius)),
+            ),
+        ),
+    ).subquery()
+    query = (
+        select(candidates)
+        .order_by(candidates.c.match_tier, candidates.c.distance, candidates.c.id)
+        .limit(limit)
+    )
+    result = await db_conn.execute(query)
+    return result.all()
+
+
+async def search_service_providers_by_text(
+    db_conn: db_dependency,
+    search_query: service_provider_model.SearchServices,
+    after: tuple[float, UUID] | None = None,
+):
+    # relevance is ts_rank scaled down with distance, so a good match a few
+    # km away still beats a weak one next door; keyset is (score, id)
+    text_query = func.websearch_to_tsquery(
+        literal_column(f"'{SEARCH_LANGUAGE}'::regconfig"), search_query.query
+    )
+    rank = func.ts_rank(user_orm.ServiceProviderTable.search_vector, text_query)
+    conditions = [user_orm.ServiceProviderTable.search_vector.op("@@")(text_query)]
+    if search_query.category:
+        conditions.append(_category_filter(search_query.category))
+
+    if search_query.coordinates is not None:
+        search_point = _search_point(search_query.coordinates)
+        distance = _distance(search_point)
+        conditions.append(_within(search_point, search_query.radius))
+        score = cast(rank, Float) / (1 + distance / float(search_query.radius))
+    else:
+        distance = literal(None, Float)
+        score = cast(rank, Float)
+
+    if after is not None:
+        after_score, after_id = after
+        conditions.append(
+            tuple_(score, user_orm.ServiceProviderTable.id)
+            < tuple_(literal(after_score), literal(after_id))
+        )
+
+    query = (
+        select(
+            user_orm.ServiceProviderTable,
+            distance.label("distance"),
+            score.label("score"),
+        )
+        .outerjoin(
+            user_orm.LocationTable,
+            user_orm.ServiceProviderTable.id
+            == user_orm.LocationTable.service_provider_id,
+        )
+        .where(*conditions)
+        .order_by(score.desc(), user_orm.ServiceProviderTable.id.desc())
+        .limit(search_query.limit)
+    )
+    result = await db_conn.execute(query)
+
+    return [
+        orm_models.ServiceProviderSearchTableModel.model_validate(
+            {
+                **service_provider.as_dict(),
+                "match_tier": 0,
+                "distance": distance,
+                "rank": score,
+            }
+        )
+        for service_provider, distance, score in result.all()
     ]
 
 
@@ -122,6 +502,8 @@ async def update_service_location_id(
         values_json["category"] = list(values_json["services_provided"].keys())
     else:
         values_json = values.model_dump(exclude_unset=True)
+    if "category" in values_json:
+        values_json["category_ids"] = catalog.category_ids(values_json["category"])
     query = (
         update(user_orm.ServiceProviderTable)
         .where(user_orm.ServiceProviderTable.id == service_id)
@@ -131,7 +513,18 @@ async def update_service_location_id(
     result = await db_conn.execute(query)
     updated_service = result.scalar_one_or_none()
     if updated_service:
-        return orm_models.ServiceProviderTableModel.model_validate(updated_service)
+        final_result = orm_models.ServiceProviderTableModel.model_validate(
+            updated_service
+        )
+        await db_conn.commit()
+        await search_index_sync.update_provider(
+            provider_id=final_result.id,
+            category=final_result.category,
+            online_status=final_result.online_status,
+            verified=final_result.verified,
+        )
+        await search_cache.invalidate_provider(service_id)
+        return final_result
     else:
         raise error.NotFoundError
 
@@ -148,7 +541,12 @@ async def upload_service_image_by_id(
     result = await db_conn.execute(query)
     updated_service = result.scalar_one_or_none()
     if updated_service:
-        return orm_models.ServiceProviderTableModel.model_validate(updated_service)
+        final_result = orm_models.ServiceProviderTableModel.model_validate(
+            updated_service
+        )
+        await db_conn.commit()
+        await search_cache.invalidate_provider(service_id)
+        return final_result
     else:
         raise error.NotFoundError
 
@@ -3,10 +3,12 @@ from uuid import UUID
 from src.root.database import db_dependency
 from src.models import service_provider_model
 from src.database.orms import user_orm
-from sqlalchemy import select, update, delete
+from src.database import search_cache, search_index_sync
+from sqlalchemy import bindparam, select, update, delete
 from sqlalchemy.orm import joinedload
 from src.custom_exceptions import error
 from src.models import orm_models
+from src.root import catalog
 
 
 async def create_service_provider(
@@ -17,11 +19,19 @@ async def create_service_provider(
     new_service = user_orm.ServiceProviderTable(
         id=service_id,
         category=services.category,
+        category_ids=catalog.category_ids(services.category),
         **services.model_dump(exclude={"category", "location"})
     )
     db_conn.add(new_service)
     await db_conn.commit()
     await db_conn.refresh(new_service)
+    await search_index_sync.update_provider(
+        provider_id=new_service.id,
+        category=new_service.category,
+        online_status=new_service.online_status,
+        verified=new_service.verified,
+    )
+    await search_cache.invalidate_provider(new_service.id)
 
     return orm_models.ServiceProviderTableModel.model_validate(new_service)
 
@@ -57,6 +67,44 @@ async def get_service_provider_by_id(
         return orm_models.ServiceProviderTableModel.model_validate(found_service)
 
 
+async def get_service_provider_last_updated(
+    db_conn: db_dependency, service_provider_id: uuid.UUID
+):
+    query = select(user_orm.ServiceProviderTable.last_updated).where(
+        user_orm.ServiceProviderTable.id == service_provider_id
+    )
+    result = await db_conn.execute(query)
+    last_updated = result.scalar_one_or_none()
+    if last_updated is None:
+        raise error.NotFoundError
+    return last_updated
+
+
+async def get_service_provider_opening_hours(
+    db_conn: db_dependency, service_provider_id: uuid.UUID
+):
+    query = select(user_orm.ServiceProviderTable.opening_hours).where(
+        user_orm.ServiceProviderTable.id == service_provider_id
+    )
+    result = await db_conn.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def get_service_providers_by_ids(
+    db_conn: db_dependency, service_provider_ids: list[uuid.UUID]
+):
+    query = select(user_orm.ServiceProviderTable).where(
+        user_orm.ServiceProviderTable.id.in_(service_provider_ids)
+    )
+    result = await db_conn.execute(query)
+    return {
+        service_provider.id: orm_models.ServiceProviderTableModel.model_validate(
+            service_provider
+        )
+        for service_provider in result.scalars().all()
+    }
+
+
 async def get_service_by_user_id(db_conn: db_dependency, user_id: UUID):
     service = select(user_orm.ServiceProviderTable).where(
         user_orm.ServiceProviderTable.user_id == user_id
@@ -81,6 +129,8 @@ async def update_service_by_id(
         values_json["category"] = list(values_json["services_provided"].keys())
     else:
         values_json = values.model_dump(exclude_unset=True)
+    if "category" in values_json:
+        values_json["category_ids"] = catalog.category_ids(values_json["category"])
 
     query = (
         update(user_orm.ServiceProviderTable)
@@ -91,12 +141,62 @@ async def update_service_by_id(
     result = await db_conn.execute(query)
     updated_service = result.scalar_one_or_none()
     if updated_service:
+        # read before commit expires the instance
+        index_values = dict(
+            provider_id=updated_service.id,
+            category=updated_service.category,
+            online_status=updated_service.online_status,
+            verified=updated_service.verified,
+        )
         await db_conn.commit()
+        await search_index_sync.update_provider(**index_values)
+        await search_cache.invalidate_provider(service_id)
         return None
     else:
         raise error.NotFoundError
 
 
+async def backfill_category_ids(db_conn: db_dependency):
+    query = select(
+        user_orm.ServiceProviderTable.id, user_orm.ServiceProviderTable.category
+    ).where(
+        user_orm.ServiceProviderTable.category_ids.is_(None),
+        user_orm.ServiceProviderTable.category.is_not(None),
+    )
+    result = await db_conn.execute(query)
+    rows = [
+        {"service_id": service_id, "codes": catalog.category_ids(category)}
+        for service_id, category in result.all()
+    ]
+    if rows:
+        table = user_orm.ServiceProviderTable.__table__
+        await db_conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("service_id"))
+            .values(category_ids=bindparam("codes")),
+            rows,
+        )
+    await db_conn.commit()
+    return len(rows)
+
+
+async def update_online_statuses(db_conn: db_dependency, statuses: dict[UUID, bool]):
+    if not statuses:
+        return 0
+    table = user_orm.ServiceProviderTable.__table__
+    await db_conn.execute(
+        update(table)
+        .where(table.c.id == bindparam("service_id"))
+        .values(online_status=bindparam("status")),
+        [
+            {"service_id": service_id, "status": status}
+            for service_id, status in statuses.items()
+        ],
+    )
+    await db_conn.commit()
+    return len(statuses)
+
+
 async def upload_service_image_by_id(
     db_conn: db_dependency, service_id: UUID, image_url: list[str]
 ):
@@ -113,6 +213,8 @@ async def upload_service_image_by_id(
             updated_service
         )
         await db_conn.commit()
+        # cached pages carry catalogue_pic; the index holds nothing it touches
+        await search_cache.invalidate_provider(service_id)
         return final_result
     else:
         raise error.NotFoundError
@@ -128,6 +230,8 @@ async def delete_service_by_id(db_conn: db_dependency, service_id: UUID):
     deleted_service = result.scalar_one_or_none()
     if deleted_service:
         await db_conn.commit()
+        await search_cache.invalidate_provider(service_id)
+        await search_index_sync.remove(service_id)
         return None
     else:
         raise error.NotFoundError
@@ -53,6 +53,78 @@ async def get_user_by_email(db_conn: db_dependency, email: str):
         raise error.NotFoundError
 
 
+async def get_login_user_by_email(db_conn: db_dependency, email: str):
+    """
+    The user and the id / verified flag of their business profile, if
+    any, in one round trip.
+    """
+    query = (
+        select(
+            user_orm.UserTable,
+            user_orm.ServiceProviderTable.id,
+            user_orm.ServiceProviderTable.verified,
+        )
+        .outerjoin(
+            user_orm.ServiceProviderTable,
+            user_orm.ServiceProviderTable.user_id == user_orm.UserTable.id,
+        )
+        .where(user_orm.UserTable.email == email)
+        .limit(1)
+    )
+    result = await db_conn.execute(query)
+    row = result.one_or_none()
+
+    if row:
+        user, service_provider_id, verified = row
+        return (
+            orm_models.UserTableModel.model_validate(user.as_dict()),
+            service_provider_id,
+            bool(verified),
+        )
+    else:
+        raise error.NotFoundError
+
+
+async def start_login_session(
+    db_conn: db_dependency, user_id: uuid.UUID, activate: bool = False
+) -> uuid.UUID:
+    # rotates the refresh token id (and activates) in one write
+    values = {"token_jit": uuid.uuid4()}
+    if activate:
+        values["is_active"] = True
+    query = (
+        update(user_orm.UserTable)
+        .where(user_orm.UserTable.id == user_id)
+        .values(**values)
+        .returning(user_orm.UserTable.token_jit)
+    )
+    result = await db_conn.execute(query)
+    token_jit = result.scalar_one_or_none()
+    if token_jit:
+        await db_conn.commit()
+        return token_jit
+    else:
+        raise error.NotFoundError
+
+
+async def clear_token_jit(
+    db_conn: db_dependency, user_id: uuid.UUID, token_jit: uuid.UUID
+) -> bool:
+    # only rows still holding this jit are written, so ending any other
+    # session costs an index lookup and no row update
+    query = (
+        update(user_orm.UserTable)
+        .where(
+            user_orm.UserTable.id == user_id,
+            user_orm.UserTable.token_jit == token_jit,
+        )
+        .values(token_jit=None)
+    )
+    result = await db_conn.execute(query)
+    await db_conn.commit()
+    return result.rowcount > 0
+
+
 async def get_service_provider_profile_by_id(
     db_conn: db_dependency, user_id: uuid.UUID
 ):
@@ -8,12 +8,14 @@ from sqlalchemy import (
     Integer,
     Index,
     TEXT,
+    text,
     Float,
+    SmallInteger,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID, ARRAY
+from sqlalchemy.dialects.postgresql import JSONB, UUID, ARRAY, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.root.abstract_database import AbstractBase
-from geoalchemy2 import Geometry
+from geoalchemy2 import Geography, Geometry
 from geoalchemy2.elements import WKBElement
 from uuid import uuid4
 
@@ -81,6 +83,8 @@ class ServiceProviderTable(AbstractBase):
     bio: Mapped[str] = mapped_column(String, nullable=True)
     address: Mapped[str] = mapped_column(JSONB, nullable=True)
     category: Mapped[str] = mapped_column(ARRAY(String), nullable=True)
+    # catalog codes of `category` (see src.root.catalog), kept in sync on write
+    category_ids: Mapped[List[int]] = mapped_column(ARRAY(SmallInteger), nullable=True)
     zip_code: Mapped[str] = mapped_column(String, nullable=True)
     opening_hours: Mapped[str] = mapped_column(JSONB, nullable=True)
     services_provided: Mapped[dict] = mapped_column(JSONB, nullable=True)
@@ -95,6 +99,9 @@ class ServiceProviderTable(AbstractBase):
     verified: Mapped[bool] = mapped_column(Boolean, default=False)
     bookings: Mapped["BookingsTable"] = relationship(back_populates="service_provider")
     user: Mapped["UserTable"] = relationship(back_populates="business_profile")
+    # weighted name/category/tags/services/bio document, maintained by the
+    # service_providers_search_vector trigger
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True)
     __table_args__ = (
         Index(
             "idx_id_service",  # Index name
@@ -102,6 +109,10 @@ class ServiceProviderTable(AbstractBase):
             unique=True,  # Unique index
             postgresql_using="btree",  # PostgreSQL specific index type
         ),
+        Index("idx_service_category_ids", "category_ids", postgresql_using="gin"),
+        Index("idx_service_category", "category", postgresql_using="gin"),
+        Index("idx_service_tags", "tags", postgresql_using="gin"),
+        Index("idx_service_search_vector", "search_vector", postgresql_using="gin"),
     )
 
 
@@ -118,6 +129,12 @@ class LocationTable(AbstractBase):
     coordinates: Mapped[WKBElement] = mapped_column(
         Geometry(geometry_type="POINT", srid=4326)
     )
+    # same point as `coordinates`, stored as geography so radius and
+    # distance are in meters
+    geography_coordinates: Mapped[WKBElement] = mapped_column(
+        Geography(geometry_type="POINT", srid=4326, spatial_index=False),
+        nullable=True,
+    )
     provider: Mapped[list["ServiceProviderTable"]] = relationship(
         back_populates="location"
     )
@@ -129,6 +146,7 @@ class LocationTable(AbstractBase):
             postgresql_using="btree",  # PostgreSQL specific index type
         ),
         Index("idx_location_geom", "coordinates", postgresql_using="gist"),
+        Index("idx_location_geog", "geography_coordinates", postgresql_using="gist"),
         Index(
             "idx_service_provider_id",  # Index name
             "service_provider_id",
@@ -199,6 +217,8 @@ class BookingsTable(AbstractBase):
         TIMESTAMP(timezone=True),
         nullable=False,
     )
+    # null on bookings made before durations were recorded
+    duration_minutes: Mapped[int] = mapped_column(Integer, nullable=True)
     address: Mapped[dict] = mapped_column(JSONB, nullable=True)
     rating: Mapped[int] = mapped_column(Integer, nullable=True)
     review: Mapped[str] = mapped_column(String, nullable=True)
@@ -209,6 +229,30 @@ class BookingsTable(AbstractBase):
     customer: Mapped["UserTable"] = relationship(back_populates="bookings")
     status: Mapped[str] = mapped_column(String, nullable=True)
 
+    __table_args__ = (
+        Index(
+            "idx_bookings_provider_created",
+            "service_provider_id",
+            "date_created",
+            postgresql_using="btree",
+        ),
+        # dispatch picks up pending quick-fix bookings oldest first
+        Index(
+            "idx_bookings_quick_fix_status_created",
+            "status",
+            "date_created",
+            postgresql_using="btree",
+            postgresql_where=text("quick_fix"),
+        ),
+        # availability looks up a provider's bookings by scheduled time
+        Index(
+            "idx_bookings_provider_scheduled",
+            "service_provider_id",
+            "scheduled_date",
+            postgresql_using="btree",
+        ),
+    )
+
 
 class InvoiceTable(AbstractBase):
     __tablename__ = "invoices"
@@ -277,3 +321,36 @@ class MessagesTable(AbstractBase):
     edited: Mapped[bool] = mapped_column(Boolean, default=False)
     read: Mapped[bool] = mapped_column(Boolean, default=False)
     user: Mapped[UserTable] = relationship(back_populates="message")
+
+
+class CatalogCategoryTable(AbstractBase):
+    __tablename__ = "catalog_categories"
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    name: Mapped[str] = mapped_column(String)
+    # the category's code in service_providers.category_ids, never reused
+    code: Mapped[int] = mapped_column(SmallInteger, unique=True)
+    # catalog version of the last change to this row
+    version: Mapped[int] = mapped_column(Integer, index=True)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class CatalogServiceTable(AbstractBase):
+    __tablename__ = "catalog_services"
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    category_id: Mapped[UUID] = mapped_column(ForeignKey(CatalogCategoryTable.id))
+    name: Mapped[str] = mapped_column(String)
+    version: Mapped[int] = mapped_column(Integer, index=True)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class CatalogChangeTable(AbstractBase):
+    # one row per catalog version
+    __tablename__ = "catalog_changes"
+    version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    entity_type: Mapped[str] = mapped_column(String)
+    entity_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+    action: Mapped[str] = mapped_column(String)
@@ -0,0 +1,74 @@
+import hashlib
+import hmac
+from enum import Enum
+from uuid import UUID
+
+from src.root.env_settings import env
+from src.root.redis_database import redis_client
+
+OTP_PREFIX = "otp"
+COOLDOWN_PREFIX = "otp:cooldown"
+
+
+class OTPPurpose(str, Enum):
+    two_factor = "2fa"
+    password_reset = "password_reset"
+
+
+def _key(purpose: OTPPurpose, user_id: UUID) -> str:
+    return f"{OTP_PREFIX}:{purpose.value}:{user_id}"
+
+
+def _cooldown_key(purpose: OTPPurpose, user_id: UUID) -> str:
+    return f"{COOLDOWN_PREFIX}:{purpose.value}:{user_id}"
+
+
+def _digest(user_id: UUID, code: str) -> bytes:
+    # keyed and bound to the user, so a leaked keyspace gives nothing away
+    return hmac.new(
+        env.TOTP_SECRET_KEY.encode(), f"{user_id}:{code}".encode(), hashlib.sha256
+    ).digest()
+
+
+async def start_cooldown(purpose: OTPPurpose, user_id: UUID) -> int:
+    """
+    Claims the resend slot. Returns 0 when a code may be sent, otherwise
+    the seconds left before the next one.
+    """
+    key = _cooldown_key(purpose, user_id)
+    if await redis_client.set(key, 1, ex=env.OTP_RESEND_COOLDOWN_SECONDS, nx=True):
+        return 0
+    return max(await redis_client.ttl(key), 1)
+
+
+async def store(purpose: OTPPurpose, user_id: UUID, code: str):
+    # a new code replaces the previous one along with its attempt count
+    key = _key(purpose, user_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, mapping={"digest": _digest(user_id, code), "attempts": 0})
+        pipe.expire(key, env.OTP_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def verify(purpose: OTPPurpose, user_id: UUID, code: str) -> bool:
+    """
+    Uses up the code when it matches. Every try counts towards
+    OTP_MAX_ATTEMPTS, after which the code is dropped.
+    """
+    key = _key(purpose, user_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hincrby(key, "attempts", 1)
+        pipe.hget(key, "digest")
+        attempts, digest = await pipe.execute()
+    if digest is None:
+        # expired or never sent; hincrby made a stray hash, drop it
+        await redis_client.delete(key)
+        return False
+    if attempts > env.OTP_MAX_ATTEMPTS:
+        await redis_client.delete(key)
+        return False
+    if not hmac.compare_digest(digest, _digest(user_id, code)):
+        return False
+    # only the request that removes the key gets to use it
+    return await redis_client.delete(key) == 1
@@ -0,0 +1,122 @@
+import time
+from uuid import UUID
+
+from src.root.redis_database import redis_client
+
+GEO_KEY = "presence:geo"
+# member -> unix time of the last heartbeat. GEO sets have no per-member
+# expiry, so this is what ages providers out
+HEARTBEAT_KEY = "presence:heartbeat"
+PRESENCE_TTL_SECONDS = 90
+
+
+async def heartbeat(provider_id: UUID, latitude: float, longitude: float) -> bool:
+    """
+    Records a live provider at a position. Returns True when the provider
+    was not present before, i.e. it just came online.
+    """
+    member = str(provider_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.geoadd(GEO_KEY, (longitude, latitude, member))
+        pipe.zadd(HEARTBEAT_KEY, {member: time.time()})
+        _, added = await pipe.execute()
+    return bool(added)
+
+
+async def touch(provider_id: UUID) -> bool:
+    # heartbeat without a new position; only extends a live entry
+    member = str(provider_id)
+    updated = await redis_client.zadd(
+        HEARTBEAT_KEY, {member: time.time()}, xx=True, ch=True
+    )
+    return bool(updated)
+
+
+async def remove(provider_id: UUID) -> bool:
+    member = str(provider_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.zrem(GEO_KEY, member)
+        pipe.zrem(HEARTBEAT_KEY, member)
+        _, removed = await pipe.execute()
+    return bool(removed)
+
+
+async def purge_expired() -> list[UUID]:
+    """
+    Drops providers whose last heartbeat is older than the TTL and returns
+    them. Several workers may purge at once; only the one whose ZREM wins
+    reports a provider.
+    """
+    cutoff = time.time() - PRESENCE_TTL_SECONDS
+    members = await redis_client.zrangebyscore(HEARTBEAT_KEY, "-inf", cutoff)
+    if not members:
+        return []
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for member in members:
+            pipe.zrem(HEARTBEAT_KEY, member)
+        pipe.zrem(GEO_KEY, *members)
+        removed = await pipe.execute()
+    return [
+        UUID(member.decode())
+        for member, was_removed in zip(members, removed)
+        if was_removed
+    ]
+
+
+async def nearby(
+    latitude: float, longitude: float, radius: float, limit: int
+) -> list[tuple[UUID, float]]:
+    """
+    Live providers within `radius` meters, nearest first, as (id, meters).
+    Entries past their TTL but not yet purged are skipped.
+    """
+    results = await redis_client.geosearch(
+        GEO_KEY,
+        longitude=longitude,
+        latitude=latitude,
+        radius=radius,
+        unit="m",
+        sort="ASC",
+        count=limit,
+        withdist=True,
+    )
+    if not results:
+        return []
+    members = [member for member, _ in results]
+    last_seen = await redis_client.zmscore(HEARTBEAT_KEY, members)
+    cutoff = time.time() - PRESENCE_TTL_SECONDS
+    return [
+        (UUID(member.decode()), float(distance))
+        for (member, distance), seen in zip(results, last_seen)
+        if seen is not None and seen >= cutoff
+    ]
+
+
+async def live_in_box(
+    latitude: float, longitude: float, width: float, height: float
+) -> list[tuple[UUID, float, float]]:
+    """
+    Live providers inside a width x height meter box centred on the point,
+    as (id, latitude, longitude). One call covers a whole dispatch batch.
+    """
+    results = await redis_client.geosearch(
+        GEO_KEY,
+        longitude=longitude,
+        latitude=latitude,
+        width=width,
+        height=height,
+        unit="m",
+        withcoord=True,
+    )
+    if not results:
+        return []
+    members = [member for member, _ in results]
+    last_seen = await redis_client.zmscore(HEARTBEAT_KEY, members)
+    cutoff = time.time() - PRESENCE_TTL_SECONDS
+    return [
+        (UUID(member.decode()), float(member_latitude), float(member_longitude))
+        for (member, (member_longitude, member_latitude)), seen in zip(
+            results, last_seen
+        )
+        if seen is not None and seen >= cutoff
+    ]
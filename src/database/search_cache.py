@@ -0,0 +1,173 @@
+import hashlib
+from typing import Iterable
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from src.database import geohash, search_index
+from src.root import logger
+from src.root.redis_database import redis_client
+
+# ~1.2km x 0.6km: groups the keys of nearby searches
+KEY_PRECISION = 6
+# ~1.1m: searches from the same spot share a key
+KEY_POINT_DECIMALS = 5
+# ~39km x 19.5km: unit of invalidation when a provider changes
+INVALIDATION_PRECISION = 4
+CACHE_TTL_SECONDS = 60
+# other workers only learn about invalidations through redis, so the
+# in-process copy is kept just long enough to absorb bursts
+LOCAL_CACHE_TTL_SECONDS = 5
+LOCAL_CACHE_SIZE = 4096
+
+KEY_PREFIX = "search:results"
+CELL_PREFIX = "search:cell"
+# results containing category-only matches can change when any provider
+# anywhere changes, so they are registered here instead of under cells
+GLOBAL_SET = "search:cell:global"
+
+local_cache: TTLCache = TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL_SECONDS)
+stats = {
+    "local_hits": 0,
+    "redis_hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+    "errors": 0,
+}
+
+
+def search_key(
+    latitude: float | None,
+    longitude: float | None,
+    categories: list[str],
+    radius: int,
+    page: str,
+    query: str | None = None,
+) -> str:
+    if latitude is not None and longitude is not None:
+        cell = geohash.encode(latitude, longitude, KEY_PRECISION)
+        # the page holds distances from the caller's own point, so the key
+        # carries that point too; rounded, a shared key is off by a metre
+        point = ",".join(
+            f"{value:.{KEY_POINT_DECIMALS}f}" for value in (latitude, longitude)
+        )
+    else:
+        cell = point = "none"
+    digest = hashlib.sha1(
+        "\x1f".join(
+            [*sorted(set(categories)), str(radius), page, query or "", point]
+        ).encode()
+    ).hexdigest()
+    return f"{KEY_PREFIX}:{cell}:{digest}"
+
+
+async def get_results(key: str) -> bytes | None:
+    payload = local_cache.get(key)
+    if payload is not None:
+        stats["local_hits"] += 1
+        return payload
+    try:
+        payload = await redis_client.get(key)
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error_logger.warning(f"search cache read failed: {e}")
+        payload = None
+    if payload is None:
+        stats["misses"] += 1
+        return None
+    stats["redis_hits"] += 1
+    local_cache[key] = payload
+    return payload
+
+
+async def store_results(
+    key: str,
+    payload: bytes,
+    latitude: float | None,
+    longitude: float | None,
+    radius: int,
+    global_dependency: bool = False,
+):
+    local_cache[key] = payload
+    if global_dependency or latitude is None or longitude is None:
+        cell_sets = [GLOBAL_SET]
+    else:
+        cell_sets = [
+            f"{CELL_PREFIX}:{cell}"
+            for cell in geohash.cells_in_radius(
+                latitude, longitude, radius, INVALIDATION_PRECISION
+            )
+        ]
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, payload, ex=CACHE_TTL_SECONDS)
+            for cell_set in cell_sets:
+                pipe.sadd(cell_set, key)
+                pipe.expire(cell_set, CACHE_TTL_SECONDS)
+            await pipe.execute()
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error_logger.warning(f"search cache write failed: {e}")
+
+
+async def invalidate_cells(cell_sets: list[str]):
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for cell_set in cell_sets:
+                pipe.smembers(cell_set)
+            members = await pipe.execute()
+        keys = {key.decode() for cell_keys in members for key in cell_keys}
+        for key in keys:
+            local_cache.pop(key, None)
+        await redis_client.delete(*keys, *cell_sets)
+        stats["invalidations"] += len(keys)
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error_logger.warning(f"search cache invalidation failed: {e}")
+
+
+def _provider_cell_sets(
+    provider_id: UUID, previous_location: tuple[float, float] | None = None
+) -> list[str]:
+    cell_sets = []
+    locations = [previous_location]
+    entry = search_index.provider_index.get(provider_id)
+    if entry is not None and entry.latitude is not None:
+        locations.append((entry.latitude, entry.longitude))
+    for location in locations:
+        if location is not None:
+            cell = geohash.encode(*location, INVALIDATION_PRECISION)
+            cell_sets.append(f"{CELL_PREFIX}:{cell}")
+    return cell_sets
+
+
+async def invalidate_provider(
+    provider_id: UUID,
+    previous_location: tuple[float, float] | None = None,
+):
+    """
+    Drops cached searches that could include the provider: those around
+    its current (and, after a move, previous) location plus every result
+    set that depends on providers outside its search radius.
+    """
+    await invalidate_cells(
+        [GLOBAL_SET, *_provider_cell_sets(provider_id, previous_location)]
+    )
+
+
+async def invalidate_providers(provider_ids: Iterable[UUID]):
+    # one round of invalidation for a batch, e.g. flushed online statuses
+    cell_sets = {GLOBAL_SET}
+    for provider_id in provider_ids:
+        cell_sets.update(_provider_cell_sets(provider_id))
+    await invalidate_cells(list(cell_sets))
+
+
+def get_stats() -> dict:
+    lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    hits = stats["local_hits"] + stats["redis_hits"]
+    return {
+        **stats,
+        "hit_ratio": hits / lookups if lookups else 0.0,
+        "local_entries": len(local_cache),
+    }
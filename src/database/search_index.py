@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+from typing import Iterable
+from uuid import UUID
+
+from src.database import geohash
+from src.root import catalog
+
+# ~4.9km x 4.9km cells at the equator
+INDEX_PRECISION = 5
+
+
+@dataclass(slots=True)
+class IndexedProvider:
+    provider_id: UUID
+    category_mask: int = 0
+    online_status: bool = False
+    verified: bool = False
+    latitude: float | None = None
+    longitude: float | None = None
+    cell: str | None = None
+
+
+@dataclass(slots=True)
+class IndexMatch:
+    provider_id: UUID
+    match_tier: int
+    distance: float
+
+
+class ProviderSearchIndex:
+    """
+    In-memory mirror of provider locations and search attributes, bucketed
+    by geohash cell. It only answers searches it can answer completely
+    (a full page of providers matching both location and category);
+    anything else returns None and the caller falls back to PostGIS.
+    """
+
+    def __init__(self, precision: int = INDEX_PRECISION):
+        self.precision = precision
+        self.ready = False
+        self._providers: dict[UUID, IndexedProvider] = {}
+        self._cells: dict[str, set[UUID]] = {}
+        self._category_bits: dict[int | str, int] = {}
+
+    def __len__(self):
+        return len(self._providers)
+
+    def category_mask(self, categories: Iterable[str] | None, create=False) -> int:
+        mask = 0
+        for category in categories or ():
+            # same matching rules as postgres: catalog names by code, anything
+            # else verbatim
+            code = catalog.category_code(category)
+            key = category if code is None else code
+            bit = self._category_bits.get(key)
+            if bit is None:
+                if not create:
+                    continue
+                bit = self._category_bits[key] = len(self._category_bits)
+            mask |= 1 << bit
+        return mask
+
+    def load(self, rows: Iterable):
+        """
+        Replaces the index contents with `rows` of (provider_id, category,
+        online_status, verified, latitude, longitude).
+        """
+        self._providers = {}
+        self._cells = {}
+        for provider_id, category, online_status, verified, latitude, longitude in rows:
+            self.update_provider(
+                provider_id=provider_id,
+                category=category,
+                online_status=online_status,
+                verified=verified,
+            )
+            if latitude is not None and longitude is not None:
+                self.upsert_location(
+                    provider_id=provider_id, latitude=latitude, longitude=longitude
+                )
+        self.ready = True
+
+    def _entry(self, provider_id: UUID) -> IndexedProvider:
+        entry = self._providers.get(provider_id)
+        if entry is None:
+            entry = self._providers[provider_id] = IndexedProvider(provider_id)
+        return entry
+
+    def update_provider(
+        self,
+        provider_id: UUID,
+        category: list[str] | None = None,
+        online_status: bool | None = None,
+        verified: bool | None = None,
+    ):
+        entry = self._entry(provider_id)
+        if category is not None:
+            entry.category_mask = self.category_mask(category, create=True)
+        if online_status is not None:
+            entry.online_status = online_status
+        if verified is not None:
+            entry.verified = verified
+
+    def upsert_location(self, provider_id: UUID, latitude: float, longitude: float):
+        entry = self._entry(provider_id)
+        if entry.cell is not None:
+            self._discard_from_cell(entry)
+        entry.latitude = latitude
+        entry.longitude = longitude
+        entry.cell = geohash.encode(latitude, longitude, self.precision)
+        self._cells.setdefault(entry.cell, set()).add(provider_id)
+
+    def remove(self, provider_id: UUID):
+        entry = self._providers.pop(provider_id, None)
+        if entry is not None and entry.cell is not None:
+            self._discard_from_cell(entry)
+
+    def get(self, provider_id: UUID) -> IndexedProvider | None:
+        return self._providers.get(provider_id)
+
+    def _discard_from_cell(self, entry: IndexedProvider):
+        bucket = self._cells.get(entry.cell)
+        if bucket is not None:
+            bucket.discard(entry.provider_id)
+            if not bucket:
+                del self._cells[entry.cell]
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        categories: list[str],
+        limit: int,
+        after: tuple[int, float, UUID] | None = None,
+    ) -> list[IndexMatch] | None:
+        if not self.ready:
+            return None
+        if after is not None and after[0] != 0:
+            # later tiers are only known to postgres
+            return None
+        after_key = after[1:] if after is not None else None
+        query_mask = self.category_mask(categories)
+        if not query_mask:
+            return None
+
+        matches = []
+        if geohash.count_cells_in_radius(
+            latitude, longitude, radius, self.precision
+        ) > len(self._cells):
+            # the radius covers more cells than are populated, walk them all
+            rings = [(radius, self._cells.keys())]
+        else:
+            rings = geohash.cell_rings(latitude, longitude, radius, self.precision)
+
+        for covered_distance, cells in rings:
+            for cell in cells:
+                for provider_id in self._cells.get(cell, ()):
+                    entry = self._providers[provider_id]
+                    if not entry.category_mask & query_mask:
+                        continue
+                    distance = geohash.haversine_meters(
+                        latitude, longitude, entry.latitude, entry.longitude
+                    )
+                    if distance > radius:
+                        continue
+                    if after_key is not None and (
+                        provider_id == after_key[1]
+                        or (distance, provider_id) <= after_key
+                    ):
+                        continue
+                    matches.append((distance, provider_id))
+            if len(matches) >= limit:
+                matches.sort()
+                # nothing in the remaining rings can beat the current page
+                if matches[limit - 1][0] <= covered_distance:
+                    break
+
+        if len(matches) < limit:
+            return None
+        matches.sort()
+        return [
+            IndexMatch(provider_id=provider_id, match_tier=0, distance=distance)
+            for distance, provider_id in matches[:limit]
+        ]
+
+
+provider_index = ProviderSearchIndex()
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Awaitable, Callable
+from uuid import UUID, uuid4
+
+import orjson
+
+from src.database import search_index
+from src.root import logger
+from src.root.redis_database import redis_client
+
+CHANNEL = "search:index"
+# messages a worker published itself are already applied locally
+WORKER_ID = uuid4().hex
+RECONNECT_SECONDS = 1
+
+# Provider writes go through here so every worker's in-memory index sees
+# them, not only the one that handled the request. Online status is left
+# out: searches never filter on it and presence flips it constantly.
+
+
+async def _publish(message: dict):
+    try:
+        await redis_client.publish(
+            CHANNEL, orjson.dumps({"worker": WORKER_ID, **message})
+        )
+    except Exception as e:
+        # the periodic reload still brings the other workers up to date
+        logger.error_logger.warning(f"search index broadcast failed: {e}")
+
+
+async def update_provider(
+    provider_id: UUID,
+    category: list[str] | None = None,
+    online_status: bool | None = None,
+    verified: bool | None = None,
+):
+    search_index.provider_index.update_provider(
+        provider_id=provider_id,
+        category=category,
+        online_status=online_status,
+        verified=verified,
+    )
+    await _publish(
+        {
+            "op": "update",
+            "id": str(provider_id),
+            "category": category,
+            "verified": verified,
+        }
+    )
+
+
+async def upsert_location(provider_id: UUID, latitude: float, longitude: float):
+    search_index.provider_index.upsert_location(
+        provider_id=provider_id, latitude=latitude, longitude=longitude
+    )
+    await _publish(
+        {
+            "op": "location",
+            "id": str(provider_id),
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+    )
+
+
+async def remove(provider_id: UUID):
+    search_index.provider_index.remove(provider_id)
+    await _publish({"op": "remove", "id": str(provider_id)})
+
+
+async def request_reload():
+    # for writes too large to send row by row, e.g. a bulk import
+    await _publish({"op": "reload"})
+
+
+def apply(message: dict) -> bool:
+    """
+    Applies another worker's change to the local index. Returns True when
+    the message asks for a full reload instead.
+    """
+    if message["op"] == "reload":
+        return True
+    provider_id = UUID(message["id"])
+    if message["op"] == "update":
+        search_index.provider_index.update_provider(
+            provider_id=provider_id,
+            category=message.get("category"),
+            verified=message.get("verified"),
+        )
+    elif message["op"] == "location":
+        search_index.provider_index.upsert_location(
+            provider_id=provider_id,
+            latitude=message["latitude"],
+            longitude=message["longitude"],
+        )
+    elif message["op"] == "remove":
+        search_index.provider_index.remove(provider_id)
+    return False
+
+
+async def listen(reload: Callable[[], Awaitable]):
+    """
+    Applies other workers' index changes as they are published. After a
+    dropped connection the index is reloaded, since messages sent in the
+    meantime are lost.
+    """
+    reconnecting = False
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CHANNEL)
+            if reconnecting:
+                await reload()
+                reconnecting = False
+            try:
+                async for message in pubsub.listen():
+                    data = orjson.loads(message["data"])
+                    if data.get("worker") == WORKER_ID:
+                        continue
+                    if apply(data):
+                        await reload()
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error_logger.warning(f"search index listener failed: {e}")
+            reconnecting = True
+            await asyncio.sleep(RECONNECT_SECONDS)
@@ -0,0 +1,83 @@
+from uuid import UUID
+
+from src.root.env_settings import env
+from src.root.redis_database import redis_client
+
+SESSION_PREFIX = "session"
+# user -> token_jits of their sessions, for logging out everywhere
+USER_SESSIONS_PREFIX = "sessions:user"
+SESSION_TTL_SECONDS = env.REFRESH_TOKEN_EXPIRE_MINS * 60
+LIVE = b"1"
+# live, and its jit is also users.token_jit (the login session), which has
+# to be cleared with it
+LIVE_STORED = b"2"
+LIVE_STATES = (LIVE, LIVE_STORED)
+# a used or revoked jit stays behind until its token would have expired,
+# so a miss never lets an old refresh token through the postgres fallback
+REVOKED = b"0"
+
+
+def _key(user_id: UUID, token_jit: UUID) -> str:
+    return f"{SESSION_PREFIX}:{user_id}:{token_jit}"
+
+
+def _user_key(user_id: UUID) -> str:
+    return f"{USER_SESSIONS_PREFIX}:{user_id}"
+
+
+async def create(user_id: UUID, token_jit: UUID, stored: bool = False):
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(
+            _key(user_id, token_jit),
+            LIVE_STORED if stored else LIVE,
+            ex=SESSION_TTL_SECONDS,
+        )
+        pipe.sadd(_user_key(user_id), str(token_jit))
+        pipe.expire(_user_key(user_id), SESSION_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def check(user_id: UUID, token_jit: UUID) -> bool | None:
+    """
+    True for a live session, False for a used or revoked one and None
+    when redis does not know the jit.
+    """
+    state = await redis_client.get(_key(user_id, token_jit))
+    return None if state is None else state in LIVE_STATES
+
+
+async def consume(user_id: UUID, token_jit: UUID) -> bytes | None:
+    """
+    Marks a session used and returns its previous state (LIVE, LIVE_STORED
+    or REVOKED), or None when redis does not know the jit. Atomic, so two
+    refreshes racing with the same token cannot both succeed.
+    """
+    state = await redis_client.set(
+        _key(user_id, token_jit), REVOKED, xx=True, keepttl=True, get=True
+    )
+    await redis_client.srem(_user_key(user_id), str(token_jit))
+    return state
+
+
+async def revoke(user_id: UUID, token_jit: UUID) -> bytes | None:
+    # returns the previous state, like consume
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(_key(user_id, token_jit), REVOKED, ex=SESSION_TTL_SECONDS, get=True)
+        pipe.srem(_user_key(user_id), str(token_jit))
+        state, _ = await pipe.execute()
+    return state
+
+
+async def revoke_all(user_id: UUID) -> int:
+    token_jits = await redis_client.smembers(_user_key(user_id))
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for token_jit in token_jits:
+            pipe.set(
+                _key(user_id, token_jit.decode()),
+                REVOKED,
+                xx=True,
+                keepttl=True,
+            )
+        pipe.delete(_user_key(user_id))
+        await pipe.execute()
+    return len(token_jits)
@@ -0,0 +1,150 @@
+import hashlib
+import ipaddress
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.root import logger
+from src.root.redis_database import redis_client
+from src.root.env_settings import env
+from src.services.authorization_service import resolve_principal
+
+RATE_LIMIT_PREFIX = "ratelimit"
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in env.TRUSTED_PROXIES.split(",")
+    if proxy.strip()
+]
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA: the key holds the theoretical arrival time (ms) of the next request.
+# A request is let through while that time is less than `burst` emission
+# intervals ahead of now. One key per client, one round trip per request,
+# and the clock is redis's so every worker agrees on it.
+GCRA_SCRIPT = redis_client.register_script("""
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if allow_at > now then
+    return allow_at - now
+end
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+return 0
+""")
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    # "5/minute" -> (5, 60)
+    amount, _, period = rate.partition("/")
+    return int(amount), PERIODS[period.strip().rstrip("s")]
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+async def client_ip(request: Request) -> str:
+    if not request.client:
+        return "unknown"
+    host = request.client.host
+    if not _trusted(host):
+        return host
+    # each proxy appends the address it got the request from, so reading
+    # from the right, the first hop that is not ours is the client; anything
+    # further left is whatever the client chose to send
+    hops = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+        host = hop
+    return host
+
+
+async def user_or_ip(request: Request) -> str:
+    # the access token's user when it has a valid one; auth rejects the rest
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            # resolved once here and reused by the route's auth dependency
+            return f"user:{resolve_principal(request, token).id}"
+        except Exception:
+            pass
+    return f"ip:{await client_ip(request)}"
+
+
+async def email_key(request: Request) -> str:
+    # FastAPI has already read the body, so this parses the cached bytes
+    email = request.query_params.get("email")
+    if email is None and request.method != "GET":
+        if request.headers.get("content-type", "").startswith("application/json"):
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            # anything but an object is left for the route to reject
+            email = body.get("email") if isinstance(body, dict) else None
+        else:
+            email = (await request.form()).get("username")
+    if not email:
+        return f"ip:{await client_ip(request)}"
+    return hashlib.sha256(str(email).strip().lower().encode()).hexdigest()
+
+
+class RateLimit:
+    """
+    Route dependency that answers with a 429 once a client goes over
+    `rate` ("<amount>/<second|minute|hour|day>") for `scope`. Clients are
+    told apart by `key`. Runs before the route's own dependencies and
+    body, and lets requests through when redis is unavailable.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        rate: str,
+        key: Callable[[Request], Awaitable[str]] = client_ip,
+    ):
+        self.scope = scope
+        self.amount, period = parse_rate(rate)
+        self.interval_ms = period * 1000 // self.amount
+        self.key = key
+
+    async def __call__(self, request: Request):
+        key = f"{RATE_LIMIT_PREFIX}:{self.scope}:{await self.key(request)}"
+        try:
+            retry_after_ms = await GCRA_SCRIPT(
+                keys=[key], args=[self.interval_ms, self.amount]
+            )
+        except RedisError as e:
+            logger.error_logger.warning(f"rate limiter unavailable: {e}")
+            return
+        if retry_after_ms:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="too many requests, try again shortly",
+                headers={"Retry-After": str(-(-int(retry_after_ms) // 1000))},
+            )
+
+
+login_by_ip = RateLimit("login:ip", env.RATE_LIMIT_LOGIN_IP)
+login_by_email = RateLimit("login:email", env.RATE_LIMITER, key=email_key)
+otp_by_ip = RateLimit("otp:ip", env.RATE_LIMIT_OTP_IP)
+otp_by_email = RateLimit("otp:email", env.RATE_LIMIT_OTP_EMAIL, key=email_key)
+search_by_user = RateLimit("search", env.RATE_LIMIT_SEARCH, key=user_or_ip)
@@ -1,8 +1,9 @@
 from enum import StrEnum
 import uuid
-from datetime import datetime
-from pydantic import Field, field_validator
+from datetime import date, datetime
+from pydantic import Field, field_validator, model_validator
 from src.root.abstract_base import AbstractBaseModel
+from src.root import catalog
 
 
 class BookingStatus(StrEnum):
@@ -12,6 +13,7 @@ class BookingStatus(StrEnum):
     COMPLETED = "COMPLETED"
     CANCELLED = "CANCELLED"
     PROCESSING = "PROCESSING"
+    OFFERED = "OFFERED"  # quick-fix booking proposed to a provider by dispatch
 
 
 class BookingAddress(AbstractBaseModel):
@@ -24,27 +26,28 @@ class BookingAddress(AbstractBaseModel):
 
 
 class CreateBookingModel(AbstractBaseModel):
-    service_provider_id: uuid.UUID
+    # left empty on quick-fix bookings, dispatch picks the provider
+    service_provider_id: uuid.UUID | None = None
     services_requested: dict | list = Field(
         examples=[
             [
                 {
-                    "id": "0b27f6a7-22b9-4b1e-bae0-0358428fa355",
+                    "id": "49ccb939-4cca-49c8-9b04-25b29b35cfd7",
                     "name": "Oil Change",
                     "price": 5000,
                 },
                 {
-                    "id": "f47ac10b-58cc-4372-a567-0e02b2c3d479",
+                    "id": "67f564b6-6956-45d8-b7f5-c7ff149c6384",
                     "name": "Engine Diagnostics",
                     "price": 150000,
                 },
                 {
-                    "id": "9c858901-8a57-4791-81fe-4c455b099bc9",
+                    "id": "8bb02738-8ba8-449f-856f-b728a3b4fd1b",
                     "name": "Fuel Injection Service",
                     "price": 90000,
                 },
                 {
-                    "id": "a2b4c5d6-e7f8-4901-9abc-1234567890de",
+                    "id": "de315755-0a91-4f4b-9c95-51c0153d88f4",
                     "name": "Timing Belt Replacement",
                     "price": 1000,
                 },
@@ -55,16 +58,41 @@ class CreateBookingModel(AbstractBaseModel):
     description: str | None = None
     address: BookingAddress | None = None
     scheduled_date: datetime
+    duration_minutes: int = Field(60, ge=15, le=720)
     quick_fix: bool = False
 
+    @model_validator(mode="after")
+    def check_provider_or_quick_fix(self):
+        if self.quick_fix:
+            if (
+                self.address is None
+                or self.address.latitude is None
+                or self.address.longitude is None
+            ):
+                raise ValueError("quick fix bookings need address coordinates")
+        elif self.service_provider_id is None:
+            raise ValueError("service_provider_id is required")
+        return self
+
+    @field_validator("services_requested")
+    @classmethod
+    def check_services_requested(cls, value):
+        return catalog.validate_services(value)
+
 
 class UpdateBookingModel(AbstractBaseModel):
     services_requested: list | None = None
     price: int | None = None
     description: str | None = None
     scheduled_date: datetime | None = None
+    duration_minutes: int | None = Field(None, ge=15, le=720)
     status: str | None = None
 
+    @field_validator("services_requested")
+    @classmethod
+    def check_services_requested(cls, value):
+        return catalog.validate_services(value)
+
 
 class UpdateBookingStatus(AbstractBaseModel):
     status: BookingStatus
@@ -82,11 +110,33 @@ class ServiceProviderDetails(AbstractBaseModel):
 class BookingResponse(AbstractBaseModel):
     id: uuid.UUID
     customer_id: uuid.UUID
-    service_provider_id: uuid.UUID
+    service_provider_id: uuid.UUID | None
     price: int
     services_requested: dict | list | None
     scheduled_date: datetime
+    duration_minutes: int | None = None
     description: str | None = None
     address: dict | None = None
     status: BookingStatus | None
     service_provider: dict | ServiceProviderDetails | None = None
+
+
+class QuickFixOffer(AbstractBaseModel):
+    id: uuid.UUID
+    services_requested: dict | list | None
+    description: str | None = None
+    address: dict | None = None
+    scheduled_date: datetime
+    duration_minutes: int | None = None
+    # the offer goes to another provider after this
+    expires_at: datetime
+
+
+class AvailabilitySlot(AbstractBaseModel):
+    start: datetime
+    end: datetime
+
+
+class DayAvailability(AbstractBaseModel):
+    day: date
+    slots: list[AvailabilitySlot]
@@ -46,6 +46,12 @@ class ServiceProviderTableModel(AbstractBaseModel):
     last_updated: datetime
 
 
+class ServiceProviderSearchTableModel(ServiceProviderTableModel):
+    match_tier: int
+    distance: float | None = None
+    rank: float | None = None  # relevance score, text searches only
+
+
 class UserTableModel(AbstractBaseModel):
     id: uuid.UUID
     first_name: str
@@ -132,7 +138,7 @@ class ProviderUserTableModel(AbstractBaseModel):
 class CustomerBookingsTableModel(AbstractBaseModel):
     id: uuid.UUID
     customer_id: uuid.UUID
-    service_provider_id: uuid.UUID
+    service_provider_id: uuid.UUID | None
     price: int | None = 0
     description: str | None
     services_requested: dict | list
@@ -142,6 +148,7 @@ class CustomerBookingsTableModel(AbstractBaseModel):
     last_updated: datetime
     address: dict | None
     scheduled_date: datetime | None
+    duration_minutes: int | None = None
     status: str | None = None
     service_provider: ServiceProviderTableModel | dict | None = None
 
@@ -149,7 +156,7 @@ class CustomerBookingsTableModel(AbstractBaseModel):
 class ProviderBookingsTableModel(AbstractBaseModel):
     id: uuid.UUID
     customer_id: uuid.UUID
-    service_provider_id: uuid.UUID
+    service_provider_id: uuid.UUID | None
     price: int | None = 0
     description: str | None
     services_requested: dict | list
@@ -159,6 +166,7 @@ class ProviderBookingsTableModel(AbstractBaseModel):
     last_updated: datetime
     address: dict | None
     scheduled_date: datetime | None
+    duration_minutes: int | None = None
     status: str | None = None
     customer: ProviderUserTableModel | dict | None = None
 
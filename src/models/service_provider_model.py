@@ -4,10 +4,51 @@ from pydantic import field_validator, Field
 from shapely.wkb import loads
 from geoalchemy2.elements import WKBElement
 from datetime import datetime
+from typing import Literal
+from src.models.orm_models import ServiceProviderSearchTableModel
+from src.root import catalog
 
 
 class AllCategory(AbstractBaseModel):
     category: dict | list
+    version: int = 0  # pass back as since_version to sync only changes
+
+
+class CatalogCategoryChange(AbstractBaseModel):
+    id: uuid.UUID
+    category: str
+
+
+class CatalogServiceChange(AbstractBaseModel):
+    id: uuid.UUID
+    category_id: uuid.UUID
+    name: str
+
+
+class CatalogDelta(AbstractBaseModel):
+    version: int
+    categories: list[CatalogCategoryChange] = []  # added or changed
+    services: list[CatalogServiceChange] = []
+    removed_categories: list[uuid.UUID] = []
+    removed_services: list[uuid.UUID] = []
+
+
+class UpsertCatalogCategory(AbstractBaseModel):
+    category: str = Field(min_length=1, max_length=100)
+
+
+class UpsertCatalogService(AbstractBaseModel):
+    category_id: uuid.UUID
+    name: str = Field(min_length=1, max_length=100)
+
+
+class CatalogMatch(AbstractBaseModel):
+    id: uuid.UUID  # usable as a SearchServices.category entry
+    name: str
+    kind: Literal["category", "service"]
+    category_id: uuid.UUID
+    category: str
+    score: float
 
 
 class Address(AbstractBaseModel):
@@ -58,22 +99,22 @@ class CreateService(AbstractBaseModel):
         examples=[
             [
                 {
-                    "id": "0b27f6a7-22b9-4b1e-bae0-0358428fa355",
+                    "id": "49ccb939-4cca-49c8-9b04-25b29b35cfd7",
                     "name": "Oil Change",
                     "price": 5000,
                 },
                 {
-                    "id": "f47ac10b-58cc-4372-a567-0e02b2c3d479",
+                    "id": "67f564b6-6956-45d8-b7f5-c7ff149c6384",
                     "name": "Engine Diagnostics",
                     "price": 150000,
                 },
                 {
-                    "id": "9c858901-8a57-4791-81fe-4c455b099bc9",
+                    "id": "8bb02738-8ba8-449f-856f-b728a3b4fd1b",
                     "name": "Fuel Injection Service",
                     "price": 90000,
                 },
                 {
-                    "id": "a2b4c5d6-e7f8-4901-9abc-1234567890de",
+                    "id": "de315755-0a91-4f4b-9c95-51c0153d88f4",
                     "name": "Timing Belt Replacement",
                     "price": 1000,
                 },
@@ -81,6 +122,11 @@ class CreateService(AbstractBaseModel):
         ],
     )
 
+    @field_validator("services_provided")
+    @classmethod
+    def check_services_provided(cls, value):
+        return catalog.validate_services(value)
+
 
 class UpdateServices(AbstractBaseModel):
     name: str | None = None
@@ -109,22 +155,22 @@ class UpdateServices(AbstractBaseModel):
         examples=[
             [
                 {
-                    "id": "0b27f6a7-22b9-4b1e-bae0-0358428fa355",
+                    "id": "49ccb939-4cca-49c8-9b04-25b29b35cfd7",
                     "name": "Oil Change",
                     "price": 5000,
                 },
                 {
-                    "id": "f47ac10b-58cc-4372-a567-0e02b2c3d479",
+                    "id": "67f564b6-6956-45d8-b7f5-c7ff149c6384",
                     "name": "Engine Diagnostics",
                     "price": 150000,
                 },
                 {
-                    "id": "9c858901-8a57-4791-81fe-4c455b099bc9",
+                    "id": "8bb02738-8ba8-449f-856f-b728a3b4fd1b",
                     "name": "Fuel Injection Service",
                     "price": 90000,
                 },
                 {
-                    "id": "a2b4c5d6-e7f8-4901-9abc-1234567890de",
+                    "id": "de315755-0a91-4f4b-9c95-51c0153d88f4",
                     "name": "Timing Belt Replacement",
                     "price": 1000,
                 },
@@ -132,6 +178,11 @@ class UpdateServices(AbstractBaseModel):
         ],
     )
 
+    @field_validator("services_provided")
+    @classmethod
+    def check_services_provided(cls, value):
+        return catalog.validate_services(value)
+
 
 class ServiceResponse(AbstractBaseModel):
     id: uuid.UUID
@@ -168,8 +219,50 @@ class LocationCoordinates(AbstractBaseModel):
 
 class SearchServices(AbstractBaseModel):
     coordinates: LocationCoordinates | None = None
-    category: list[str]
+    category: list[str] = []
+    query: str | None = Field(None, max_length=200)  # free text, e.g. "leaking tap"
     location: str | None = None
+    radius: int = Field(50000, gt=0, le=500000)  # meters
+    limit: int = Field(20, ge=1, le=100)
+    # ranked: weighted distance/rating/verified/online/profile/bookings score
+    sort: Literal["distance", "ranked"] = "distance"
+    cursor: str | None = None  # next_cursor from the previous page
+
+
+class ServiceProviderSearchPage(AbstractBaseModel):
+    results: list[ServiceProviderSearchTableModel]
+    next_cursor: str | None = None
+
+
+class BulkProviderRecord(AbstractBaseModel):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    user_id: uuid.UUID | None = None
+    name: str
+    bio: str | None = None
+    category: list[str] = []
+    tags: list[str] | None = None
+    zip_code: str | None = None
+    opening_hours: dict[str, dict] | None = None
+    services_provided: dict | list | None = None
+    address: list[Address] | None = None
+    is_active: bool = True
+    verified: bool = False
+    longitude: float | None = Field(None, ge=-180, le=180)
+    latitude: float | None = Field(None, ge=-90, le=90)
+
+    @field_validator("services_provided")
+    @classmethod
+    def check_services_provided(cls, value):
+        return catalog.validate_services(value)
+
+
+class BulkImportReport(AbstractBaseModel):
+    providers: int = 0
+    locations: int = 0
+    skipped: int = 0
+    errors: list[str] = []
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
 
 
 class UpdateVerifiedStatus(AbstractBaseModel):
@@ -183,6 +276,16 @@ class UpdateServiceProvider(UpdateServices):
 
 class UpdateOnlineStatus(AbstractBaseModel):
     online_status: bool | None = None
+    coordinates: Coordinates | None = None  # defaults to the stored location
+
+
+class PresenceHeartbeat(AbstractBaseModel):
+    coordinates: Coordinates | None = None
+
+
+class NearbyProvider(AbstractBaseModel):
+    id: uuid.UUID
+    distance: float  # meters
 
 
 class CustomerProfileResponse(AbstractBaseModel):
@@ -0,0 +1,216 @@
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable
+
+CATALOG_PATH = "services2.json"
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+# the file seeds the catalog tables; once they are loaded set_catalog
+# replaces it with the database copy
+_catalog: list[dict] | None = None
+_version = 0
+
+
+def read_catalog_file() -> list[dict]:
+    with open(CATALOG_PATH, "r") as file:
+        return json.load(file)
+
+
+def load_catalog() -> list[dict]:
+    global _catalog
+    if _catalog is None:
+        _catalog = read_catalog_file()
+    return _catalog
+
+
+def get_version() -> int:
+    return _version
+
+
+def set_catalog(categories: list[dict], version: int):
+    global _catalog, _version
+    _catalog, _version = categories, version
+    category_codes.cache_clear()
+    _codes_by_id.cache_clear()
+    get_registry.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def category_codes() -> dict[str, int]:
+    """
+    Maps each normalized category name to a small integer code, numbered
+    from 1 in file order. Once the catalog comes from the database each
+    category carries its stored code, which is never reused, so codes in
+    service_providers.category_ids keep their meaning.
+    """
+    return {
+        normalize_name(category["category"]): category.get("code", position)
+        for position, category in enumerate(load_catalog(), start=1)
+    }
+
+
+@lru_cache(maxsize=1)
+def _codes_by_id() -> dict[str, int]:
+    # category ids and service ids both resolve to the category's code
+    codes = {}
+    for position, category in enumerate(load_catalog(), start=1):
+        code = category.get("code", position)
+        codes[category["id"]] = code
+        for service in category["services"]:
+            codes[service["id"]] = code
+    return codes
+
+
+def category_code(name: str) -> int | None:
+    """
+    Resolves a category name, category id or service id to its code.
+    """
+    code = _codes_by_id().get(name.strip().lower())
+    if code is not None:
+        return code
+    return category_codes().get(normalize_name(name))
+
+
+def category_ids(categories: Iterable[str] | str | None) -> list[int] | None:
+    if categories is None:
+        return None
+    if isinstance(categories, str):
+        categories = [categories]
+    codes = {category_code(category) for category in categories}
+    codes.discard(None)
+    return sorted(codes)
+
+
+def split_categories(categories: Iterable[str]) -> tuple[list[int], list[str]]:
+    # names outside the catalog have no code and can only match as text
+    codes, unknown = set(), []
+    for category in categories:
+        code = category_code(category)
+        if code is None:
+            unknown.append(category)
+        else:
+            codes.add(code)
+    return sorted(codes), unknown
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogService:
+    id: str
+    name: str
+    category_id: str
+    category: str
+
+
+@dataclass(slots=True)
+class CatalogRegistry:
+    """
+    Hash indexes over the catalog so a requested service resolves in one
+    lookup instead of a scan of the nested JSON.
+    """
+
+    services_by_id: dict[str, CatalogService] = field(default_factory=dict)
+    # a service name may appear under more than one category
+    services_by_name: dict[str, list[CatalogService]] = field(default_factory=dict)
+    services_by_category: dict[str, list[CatalogService]] = field(default_factory=dict)
+    # normalized category name or category id -> category id
+    category_ids: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_catalog(cls, categories: list[dict]) -> "CatalogRegistry":
+        registry = cls()
+        for category in categories:
+            category_id = category["id"].lower()
+            registry.category_ids[category_id] = category_id
+            registry.category_ids[normalize_name(category["category"])] = category_id
+            services = registry.services_by_category.setdefault(category_id, [])
+            for service in category["services"]:
+                entry = CatalogService(
+                    id=service["id"].lower(),
+                    name=service["name"],
+                    category_id=category_id,
+                    category=category["category"],
+                )
+                services.append(entry)
+                registry.services_by_id[entry.id] = entry
+                registry.services_by_name.setdefault(
+                    normalize_name(entry.name), []
+                ).append(entry)
+        return registry
+
+    def resolve_category(self, category: str) -> str | None:
+        return self.category_ids.get(category.strip().lower()) or self.category_ids.get(
+            normalize_name(category)
+        )
+
+    def resolve_service(
+        self, service: dict, category_id: str | None = None
+    ) -> CatalogService:
+        service_id = service.get("id")
+        if service_id:
+            entry = self.services_by_id.get(str(service_id).strip().lower())
+            if entry is None:
+                raise ValueError(f"unknown service id {service_id}")
+        elif service.get("name"):
+            matches = self.services_by_name.get(normalize_name(str(service["name"])))
+            if matches and category_id is not None:
+                matches = [
+                    match for match in matches if match.category_id == category_id
+                ]
+            if not matches:
+                raise ValueError(f"unknown service {service['name']}")
+            if len(matches) > 1:
+                raise ValueError(f"service {service['name']} is ambiguous, send its id")
+            entry = matches[0]
+        else:
+            raise ValueError("each service needs an id or a name")
+        if category_id is not None and entry.category_id != category_id:
+            raise ValueError(f"service {entry.name} is not in that category")
+        return entry
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> CatalogRegistry:
+    return CatalogRegistry.from_catalog(load_catalog())
+
+
+def _validate_items(items: list, category_id: str | None = None) -> list[dict]:
+    registry = get_registry()
+    validated = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("services must be objects with an id or a name")
+        entry = registry.resolve_service(item, category_id=category_id)
+        # extra fields such as price are kept, id and name become canonical
+        validated.append({**item, "id": entry.id, "name": entry.name})
+    return validated
+
+
+def validate_services(services: dict | list | None) -> dict | list | None:
+    """
+    Checks requested or provided services against the catalog in one
+    lookup per item. Accepts a list of services, a single service, or a
+    mapping of category to its services. Raises ValueError on anything
+    the catalog does not know.
+    """
+    if services is None:
+        return None
+    if isinstance(services, list):
+        return _validate_items(services)
+    if "id" in services or "name" in services:
+        return _validate_items([services])[0]
+
+    registry = get_registry()
+    validated = {}
+    for category, items in services.items():
+        category_id = registry.resolve_category(category)
+        if category_id is None:
+            raise ValueError(f"unknown category {category}")
+        validated[category] = _validate_items(
+            items if isinstance(items, list) else [items], category_id=category_id
+        )
+    return validated
@@ -19,6 +19,10 @@ class Settings(BaseSettings):
 
     # two factor authentication
     TOTP_SECRET_KEY: str
+    # one-time codes live in redis; a code is dropped after too many tries
+    OTP_TTL_SECONDS: int = 300
+    OTP_MAX_ATTEMPTS: int = 5
+    OTP_RESEND_COOLDOWN_SECONDS: int = 60
 
     # password token
     RESET_PASSWORD_SECRET_KEY: str
@@ -39,8 +43,28 @@ class Settings(BaseSettings):
     MAIL_PORT: int
     MAIL_SERVER: str
 
-    # Rate limiter
+    # Rate limiter; RATE_LIMITER is the per-email login limit
     RATE_LIMITER: str = "5/minute"
+    RATE_LIMIT_LOGIN_IP: str = "30/minute"
+    RATE_LIMIT_OTP_IP: str = "10/minute"
+    RATE_LIMIT_OTP_EMAIL: str = "5/minute"
+    RATE_LIMIT_SEARCH: str = "60/minute"
+    # comma separated proxy addresses or CIDRs (e.g. "10.0.0.0/8,127.0.0.1").
+    # X-Forwarded-For is only read when the peer is one of them, and only
+    # up to the first hop that is not; empty means the peer is the client
+    TRUSTED_PROXIES: str = ""
+
+    # search ranking weights (sort=ranked)
+    RANKING_WEIGHT_DISTANCE: float = 0.35
+    RANKING_WEIGHT_RATING: float = 0.25
+    RANKING_WEIGHT_VERIFIED: float = 0.1
+    RANKING_WEIGHT_ONLINE: float = 0.1
+    RANKING_WEIGHT_COMPLETENESS: float = 0.1
+    RANKING_WEIGHT_BOOKINGS: float = 0.1
+
+    # bcrypt worker pool; calls past workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
 
     # FRONTEND_URL: str
     # FRONTEND_HOST_RESET_PASSWORD_URL: str
@@ -64,6 +88,11 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     # GOOGLE_OAUTH_REDIRECT_URI_WEB: str
     GOOGLE_OAUTH_REDIRECT_URI_MOBILE: str
+    # comma separated Android/iOS client ids; ID tokens from these are
+    # accepted alongside GOOGLE_CLIENT_ID
+    GOOGLE_MOBILE_CLIENT_IDS: str = ""
+    # signing keys for Google ID tokens; point at a local JWKS to test
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
 
     # Fixer
     # FIXER_SECRET: str
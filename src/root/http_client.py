@@ -0,0 +1,8 @@
+import httpx
+
+# one pooled client for outbound calls, so each request reuses connections
+http_client = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+
+
+async def shutdown_http_client():
+    await http_client.aclose()
@@ -1,5 +1,6 @@
+import asyncio
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,8 +8,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.middleware import exception_middleware
 from src.middleware import session_middleware
 
-# from backend.src.middleware.ratelimiting import limiter
-from src.root.database import shutdown, startup
+from src.root.database import SessionLocal, shutdown, startup
+from src.root.redis_database import shutdown_redis
+from src.root.http_client import shutdown_http_client
+from src.database import search_index_sync
+from src.database.handlers import locations_handler, service_provider_handler
+from src.services import (
+    catalog_matcher,
+    dispatch_service,
+    google_id_token,
+    password_hashing,
+    presence_service,
+    service_management_service,
+    service_provider,
+)
+from src.root import catalog
 from src.root.env_settings import env
 
 from src.root.subrouter import api_router
@@ -17,14 +31,48 @@ from src.root.subrouter import api_router
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
     await startup()
+    async with SessionLocal() as db_conn:
+        await service_management_service.sync_catalog(db_conn=db_conn)
+    catalog.get_registry()
+    catalog_matcher.get_matcher()
+    service_management_service.get_serialized_catalog()
+    async with SessionLocal() as db_conn:
+        await locations_handler.backfill_geography_coordinates(db_conn=db_conn)
+        await service_provider_handler.backfill_category_ids(db_conn=db_conn)
+        await service_provider.build_search_index(db_conn=db_conn)
+    index_refresh = asyncio.create_task(
+        service_provider.refresh_search_index_periodically()
+    )
+    presence_flush = asyncio.create_task(presence_service.flush_presence_periodically())
+    dispatch = asyncio.create_task(dispatch_service.dispatch_periodically())
+    catalog_refresh = asyncio.create_task(
+        service_management_service.refresh_catalog_periodically()
+    )
+    google_keys_refresh = asyncio.create_task(
+        google_id_token.google_keys.refresh_periodically()
+    )
+    index_sync = asyncio.create_task(
+        search_index_sync.listen(service_provider.reload_search_index)
+    )
     yield
+    index_refresh.cancel()
+    presence_flush.cancel()
+    dispatch.cancel()
+    catalog_refresh.cancel()
+    google_keys_refresh.cancel()
+    index_sync.cancel()
+    # a flush cut short puts its batch back, so wait for it before the last one
+    with suppress(asyncio.CancelledError):
+        await presence_flush
+    await presence_service.flush_pending_statuses()
+    password_hashing.shutdown()
+    await shutdown_redis()
+    await shutdown_http_client()
     await shutdown()
 
 
 app = FastAPI(title="Handy Hive Project", version="0.0.1", lifespan=app_lifespan)
 
-# app.state.limiter = limiter
-
 app.include_router(router=api_router)
 
 origins = ["*"]
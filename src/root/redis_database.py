@@ -0,0 +1,8 @@
+import redis.asyncio as redis
+from src.root.env_settings import env
+
+redis_client = redis.Redis.from_url(env.REDIS_URL)
+
+
+async def shutdown_redis():
+    await redis_client.aclose()
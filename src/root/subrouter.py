@@ -9,6 +9,8 @@ from src.routes.message_route import router as message_router
 from src.routes.actors.customers.booking_route import router as customer_router
 from src.routes.actors.customers.customer_invoice_route import router as invoice_router
 from src.routes.customer_care_route import router as customer_care_router
+from src.routes.metrics_route import router as metrics_router
+from src.routes.admin_route import router as admin_router
 
 api_router = APIRouter()
 
@@ -20,3 +22,5 @@ api_router.include_router(router=message_router)
 api_router.include_router(router=customer_router)
 api_router.include_router(router=invoice_router)
 api_router.include_router(router=customer_care_router)
+api_router.include_router(router=metrics_router)
+api_router.include_router(router=admin_router)
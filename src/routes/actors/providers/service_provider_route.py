@@ -1,15 +1,23 @@
 import uuid
-from fastapi import APIRouter, Depends, File, UploadFile
+from datetime import date
+from fastapi import APIRouter, Depends, File, Query, UploadFile
 from pydantic import UUID4
+from src.middleware import rate_limiting
 from src.models.responses import SuccessfulResponse
 from src.models import bookings_model
-from src.services import booking_service
+from src.services import (
+    availability_service,
+    booking_service,
+    dispatch_service,
+    presence_service,
+)
 from src.models import service_provider_model
-from src.models.token_models import ProviderAccessTokenData
+from src.models.token_models import AccessTokenData, ProviderAccessTokenData
 from src.services import service_provider
 from src.root.database import db_dependency
 from src.services.authorization_service import (
     get_business_verification_service,
+    get_user_verification_service,
 )
 from src.root.database import db_dependency
 
@@ -33,6 +41,7 @@ async def create_service_provider(
 @router.post(
     "/search",
     description="Get single Service Provider",
+    dependencies=[Depends(rate_limiting.search_by_user)],
 )
 async def search_service_provider(
     db_conn: db_dependency,
@@ -102,14 +111,61 @@ async def update_verified_status(
 
 @router.patch("/online-status", description="Update Provider Online Status")
 async def update_online_status(
-    db_conn: db_dependency,
     status: service_provider_model.UpdateOnlineStatus,
     user_info: ProviderAccessTokenData = Depends(get_business_verification_service),
 ):
-    return await service_provider.update_online_status(
+    return await presence_service.update_online_status(
+        provider_id=user_info.service_provider_id, values=status
+    )
+
+
+@router.post(
+    "/presence/heartbeat",
+    description="Keep the provider live for quick-fix dispatch",
+    response_model=SuccessfulResponse,
+)
+async def presence_heartbeat(
+    heartbeat: service_provider_model.PresenceHeartbeat,
+    user_info: ProviderAccessTokenData = Depends(get_business_verification_service),
+):
+    return await presence_service.heartbeat(
+        provider_id=user_info.service_provider_id, values=heartbeat
+    )
+
+
+@router.get(
+    "/quick-fix/offers",
+    description="Quick-fix bookings dispatch has offered to the provider",
+    response_model=list[bookings_model.QuickFixOffer],
+)
+async def get_quick_fix_offers(
+    db_conn: db_dependency,
+    user_info: ProviderAccessTokenData = Depends(get_business_verification_service),
+):
+    return await dispatch_service.get_offers(
+        db_conn=db_conn, provider_id=user_info.service_provider_id
+    )
+
+
+@router.get(
+    "/presence/nearby",
+    description="Online providers near a point, nearest first",
+    response_model=list[service_provider_model.NearbyProvider],
+)
+async def get_nearby_online_providers(
+    db_conn: db_dependency,
+    latitude: float = Query(ge=-90, le=90),
+    longitude: float = Query(ge=-180, le=180),
+    radius: int = Query(5000, gt=0, le=50000),  # meters
+    limit: int = Query(20, ge=1, le=100),
+    _: AccessTokenData = Depends(get_user_verification_service),
+):
+    return await presence_service.get_nearby_online_providers(
         db_conn=db_conn,
-        service_provider_id=user_info.service_provider_id,
-        values=status,
+        latitude=latitude,
+        longitude=longitude,
+        radius=radius,
+        limit=limit,
     )
 
 
@@ -169,9 +225,25 @@ async def update_bookings(
     )
 
 
-@router.get("/available-time/{provider_id}")
+@router.get(
+    "/available-time/{provider_id}",
+    description="Free booking slots of a provider between two dates (inclusive)",
+    response_model=list[bookings_model.DayAvailability],
+)
 async def get_provider_available_time(
     db_conn: db_dependency,
+    provider_id: uuid.UUID,
+    start_date: date,
+    end_date: date | None = None,
+    slot_minutes: int = Query(60, ge=15, le=720),
+    timezone: str = "UTC",
     _: ProviderAccessTokenData = Depends(get_business_verification_service),
 ):
-    return ["8:00am", "9:00am"]
+    return await availability_service.get_provider_availability(
+        db_conn=db_conn,
+        provider_id=provider_id,
+        start_date=start_date,
+        end_date=end_date,
+        slot_minutes=slot_minutes,
+        tz_name=timezone,
+    )
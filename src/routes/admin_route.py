@@ -0,0 +1,84 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, UploadFile
+from src.models import service_provider_model
+from src.models.token_models import AccessTokenData
+from src.root.database import db_dependency
+from src.services import bulk_import_service, service_management_service
+from src.services.authorization_service import get_admin_verification_service
+
+router = APIRouter(tags=["Admin"], prefix="/api/v1/admin")
+
+
+@router.post(
+    "/providers/import",
+    description="Bulk import service providers from an NDJSON or CSV file",
+    response_model=service_provider_model.BulkImportReport,
+)
+async def import_service_providers(
+    file: UploadFile,
+    chunk_size: int = Query(bulk_import_service.DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return await bulk_import_service.import_upload(upload=file, chunk_size=chunk_size)
+
+
+@router.put(
+    "/catalog/categories/{category_id}",
+    description="Add or rename a catalog category",
+    response_model=service_provider_model.CatalogDelta,
+)
+async def upsert_catalog_category(
+    category_id: UUID,
+    values: service_provider_model.UpsertCatalogCategory,
+    db_conn: db_dependency,
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return await service_management_service.upsert_category(
+        db_conn=db_conn, category_id=category_id, values=values
+    )
+
+
+@router.delete(
+    "/catalog/categories/{category_id}",
+    description="Remove a catalog category and its services",
+    response_model=service_provider_model.CatalogDelta,
+)
+async def delete_catalog_category(
+    category_id: UUID,
+    db_conn: db_dependency,
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return await service_management_service.delete_category(
+        db_conn=db_conn, category_id=category_id
+    )
+
+
+@router.put(
+    "/catalog/services/{service_id}",
+    description="Add, rename or move a catalog service",
+    response_model=service_provider_model.CatalogDelta,
+)
+async def upsert_catalog_service(
+    service_id: UUID,
+    values: service_provider_model.UpsertCatalogService,
+    db_conn: db_dependency,
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return await service_management_service.upsert_service(
+        db_conn=db_conn, service_id=service_id, values=values
+    )
+
+
+@router.delete(
+    "/catalog/services/{service_id}",
+    description="Remove a catalog service",
+    response_model=service_provider_model.CatalogDelta,
+)
+async def delete_catalog_service(
+    service_id: UUID,
+    db_conn: db_dependency,
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return await service_management_service.delete_service(
+        db_conn=db_conn, service_id=service_id
+    )
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, Header, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
+from src.middleware import rate_limiting
 from src.root.database import db_dependency
 from src.services import authorization_service, authentication as authentication_service
+from src.services import token as token_service
 from src.root.env_settings import env
 from src.models import token_models
 from src.models import authentication as authentication_model, user_model
@@ -34,12 +36,16 @@ async def refresh_token(
     db_conn: db_dependency,
     refresh_token: str = Header(),
 ):
-    return await authorization_service.verify_and_update_refresh_token(
-        refresh_token=refresh_token, db_conn=db_conn, token_service=token_service
-    )
+    return await token_service.refresh_tokens(db_conn=db_conn, token=refresh_token)
 
 
-@router.post("/token")
+@router.post(
+    "/token",
+    dependencies=[
+        Depends(rate_limiting.login_by_ip),
+        Depends(rate_limiting.login_by_email),
+    ],
+)
 async def token(
     db_conn: db_dependency,
     form_data=Depends(OAuth2PasswordRequestForm),
@@ -72,6 +78,7 @@ async def google_oauth_token(
 @router.post(
     "/signup",
     summary="Login",
+    dependencies=[Depends(rate_limiting.otp_by_ip)],
     status_code=status.HTTP_201_CREATED,
     response_model=authentication_model.CreateUserResponse,
 )
@@ -87,6 +94,10 @@ async def signup(
 
 @router.post(
     "/login",
+    dependencies=[
+        Depends(rate_limiting.login_by_ip),
+        Depends(rate_limiting.login_by_email),
+    ],
     response_model=authentication_model.LoginResponse
     | authentication_model.TwoFAResponse,
     summary="Login",
@@ -109,6 +120,7 @@ async def login(
 )
 async def logout(
     db_conn: db_dependency,
+    refresh_token: str | None = Header(None),
     user_info: token_models.AccessTokenData = Depends(
         authorization_service.get_user_verification_service
     ),
@@ -116,12 +128,34 @@ async def logout(
     return await authentication_service.logout(
         user_id=user_info.id,
         db_conn=db_conn,
+        refresh_token=refresh_token,
+    )
+
+
+@router.post(
+    "/logout/all",
+    summary="logout from every device",
+    status_code=status.HTTP_200_OK,
+)
+async def logout_everywhere(
+    db_conn: db_dependency,
+    user_info: token_models.AccessTokenData = Depends(
+        authorization_service.get_user_verification_service
+    ),
+):
+    return await authentication_service.logout_everywhere(
+        user_id=user_info.id,
+        db_conn=db_conn,
     )
 
 
 @router.post(
     "/verify/2fa",
     summary="two factor verification",
+    dependencies=[
+        Depends(rate_limiting.otp_by_ip),
+        Depends(rate_limiting.otp_by_email),
+    ],
     # response_model=authentication_model.LoginResponse,
     status_code=status.HTTP_202_ACCEPTED,
 )
@@ -141,6 +175,10 @@ async def verify_2fa_passcode(
 @router.get(
     "/verify/email",
     summary="email verification code",
+    dependencies=[
+        Depends(rate_limiting.otp_by_ip),
+        Depends(rate_limiting.otp_by_email),
+    ],
     response_model=authentication_model.SuccessfulResponse,
     status_code=status.HTTP_202_ACCEPTED,
 )
@@ -155,16 +193,33 @@ async def get_verification_email_code(
     return authentication_model.SuccessfulResponse
 
 
-@router.post("/password/reset/otp", status_code=status.HTTP_202_ACCEPTED)
+@router.post(
+    "/password/reset/otp",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[
+        Depends(rate_limiting.otp_by_ip),
+        Depends(rate_limiting.otp_by_email),
+    ],
+)
 async def get_password_reset_otp(
     db_conn: db_dependency, reset_schema: authentication_model.PasswordResetCodeSchema
 ):
     return await authentication_service.resend_2fa_code(
-        email=reset_schema.email, db_conn=db_conn, subject="Password Reset OTP"
+        email=reset_schema.email,
+        db_conn=db_conn,
+        subject="Password Reset OTP",
+        purpose=authentication_service.OTPPurpose.password_reset,
     )
 
 
-@router.post("/password/reset", status_code=status.HTTP_202_ACCEPTED)
+@router.post(
+    "/password/reset",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[
+        Depends(rate_limiting.otp_by_ip),
+        Depends(rate_limiting.otp_by_email),
+    ],
+)
 async def reset_password(
     db_conn: db_dependency,
     reset_schema: authentication_model.PasswordResetSchema,
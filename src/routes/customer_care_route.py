@@ -2,7 +2,6 @@ import uuid
 from fastapi import APIRouter, Depends, WebSocket
 from src.models.token_models import AccessTokenData
 from src.root.database import db_dependency
-from src.services.authorization_service import get_user_verification_service_ws
 import json
 from time import time
 from typing import Any
@@ -19,9 +18,10 @@ from src.services import message_service
 from src.root.database import db_dependency
 from src.models import message_model
 from src.services.authorization_service import (
-    get_user_verification_service_ws,
+    Principal,
+    get_principal_ws,
 )
-from src.database.handlers import user_handler, message_handler
+from src.database.handlers import message_handler
 from exponent_server_sdk import PushClient
 import redis.asyncio as redis
 from src.root.env_settings import env
@@ -43,14 +43,15 @@ async def customer_care_chat(
     websocket: WebSocket,
     receiver_id: uuid.UUID,
     db_conn: db_dependency,
-    token_info: AccessTokenData = Depends(get_user_verification_service_ws),
+    principal: Principal = Depends(get_principal_ws),
 ):
+    token_info = principal.token_data
 
     await websocket.accept()
     messages = await message_service.get_user_messages(
         db_conn=db_conn, user_id=token_info.id, receiver_id=receiver_id
     )
-    user = await user_handler.get_user_by_id(db_conn=db_conn, user_id=token_info.id)
+    user = await principal.get_user(db_conn=db_conn)
     profile_pic = user.profile_pic
     push_client = PushClient()
     listener_task, channel_name = None, None
@@ -18,10 +18,11 @@ from src.services import message_service
 from src.root.database import db_dependency
 from src.models import message_model
 from src.services.authorization_service import (
+    Principal,
+    get_principal_ws,
     get_user_verification_service,
-    get_user_verification_service_ws,
 )
-from src.database.handlers import user_handler, message_handler
+from src.database.handlers import message_handler
 from exponent_server_sdk import PushClient
 from src.root.env_settings import env
 
@@ -107,15 +108,16 @@ async def websocket_endpoint(
     websocket: WebSocket,
     receiver_id: UUID,
     db_conn: db_dependency,
-    token_info: AccessTokenData = Depends(get_user_verification_service_ws),
+    principal: Principal = Depends(get_principal_ws),
 ):
+    token_info = principal.token_data
 
     # send me the time of your last message
     await websocket.accept()
     messages = await message_service.get_user_messages(
         db_conn=db_conn, user_id=token_info.id, receiver_id=receiver_id
     )
-    user = await user_handler.get_user_by_id(db_conn=db_conn, user_id=token_info.id)
+    user = await principal.get_user(db_conn=db_conn)
     profile_pic: str | None = user.profile_pic
     print(messages)
     push_client = PushClient()
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from src.models.token_models import AccessTokenData
+from src.services import dispatch_service, password_hashing, service_provider
+from src.services.authorization_service import get_admin_verification_service
+
+router = APIRouter(tags=["Metrics"], prefix="/api/v1/metrics")
+
+
+@router.get(
+    "/search-cache",
+    description="Provider search cache hit/miss counters",
+)
+async def get_search_cache_stats(
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return service_provider.get_search_cache_stats()
+
+
+@router.get(
+    "/dispatch",
+    description="Quick-fix dispatch batch and offer counters",
+)
+async def get_dispatch_stats(
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return dispatch_service.get_stats()
+
+
+@router.get(
+    "/password-hashing",
+    description="bcrypt pool size, shed requests and queue wait / hash time",
+)
+async def get_password_hashing_stats(
+    _: AccessTokenData = Depends(get_admin_verification_service),
+):
+    return password_hashing.get_stats()
@@ -3,7 +3,11 @@ from src.models.token_models import AccessTokenData
 from src.services import profile_service
 from src.root.database import db_dependency
 from src.models import user_model
-from src.services.authorization_service import get_user_verification_service
+from src.services.authorization_service import (
+    Principal,
+    get_principal,
+    get_user_verification_service,
+)
 
 router = APIRouter(tags=["Profile"], prefix="/api/v1/profile")
 
@@ -15,11 +19,9 @@ router = APIRouter(tags=["Profile"], prefix="/api/v1/profile")
 )
 async def get_profile(
     db_conn: db_dependency,
-    token_info: AccessTokenData = Depends(get_user_verification_service),
+    principal: Principal = Depends(get_principal),
 ):
-    return await profile_service.get_user_profile(
-        db_conn=db_conn, user_id=token_info.id
-    )
+    return await profile_service.get_user_profile(db_conn=db_conn, principal=principal)
 
 
 @router.patch(
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query
 from src.models import service_provider_model
 from src.models.token_models import AccessTokenData
-from src.services import service_management_service
+from src.services import catalog_matcher, service_management_service
 from src.root.database import db_dependency
 from src.models import user_model
 from src.services.authorization_service import get_user_verification_service
@@ -15,6 +15,28 @@ router = APIRouter(tags=["Services"], prefix="/api/v1/services")
     description="Get all available services",
 )
 async def get_all_services(
+    db_conn: db_dependency,
+    since_version: int | None = Query(
+        None, ge=0, description="Only return changes after this catalog version"
+    ),
+    if_none_match: str | None = Header(None),
     _: AccessTokenData = Depends(get_user_verification_service),
 ):
-    return service_management_service.get_all_services()
+    if since_version is not None:
+        return await service_management_service.get_catalog_changes(
+            db_conn=db_conn, since_version=since_version, if_none_match=if_none_match
+        )
+    return service_management_service.get_all_services(if_none_match=if_none_match)
+
+
+@router.get(
+    "/match",
+    description="Match free text against catalog categories and services",
+    response_model=list[service_provider_model.CatalogMatch],
+)
+async def match_services(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(5, ge=1, le=20),
+    _: AccessTokenData = Depends(get_user_verification_service),
+):
+    return catalog_matcher.match_catalog(q, limit=limit)
@@ -1,14 +1,14 @@
 from datetime import timedelta
-import pyotp
-import time
+import secrets
 from fastapi import HTTPException, Request, status
 from uuid import UUID
 
 
 from src.models import token_models
-from src.database.handlers import user_handler, service_provider_handler
+from src.database import otp_store, sessions
+from src.database.otp_store import OTPPurpose
+from src.database.handlers import user_handler
 from src.models import user_model, email_model, authentication
-from passlib.context import CryptContext
 from src.root.database import db_dependency
 from src.custom_exceptions import error
 from src.services.notifications import authorizationcode_email
@@ -16,11 +16,10 @@ from src.services import token as token_service
 from src.root.env_settings import env
 from authlib.integrations.starlette_client import OAuth
 from src.models import authentication
-from google.auth.transport import requests as google_oauth_request
-from google.oauth2 import id_token
 from src.models import user_model, orm_models
 from src.root import logger
-from src.services import referal_service
+from src.services import google_id_token, referal_service
+from src.services.password_hashing import hash_password, verify_password
 
 
 oauth = OAuth()
@@ -31,63 +30,66 @@ oauth.register(
     client_secret=env.GOOGLE_CLIENT_SECRET,
     client_kwargs={"scope": "email openid profile"},
 )
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"])
 
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password, hashed_password) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def generate_2fa_code():
+    return f"{secrets.randbelow(1_000_000):06d}"
 
 
-def generate_2fa_code():
-    secret_key = pyotp.random_base32()
-    totp = pyotp.TOTP(secret_key, interval=30)
-    return totp.now()
+async def check_otp(purpose: OTPPurpose, user_id: UUID, code: str) -> bool:
+    try:
+        return await otp_store.verify(purpose, user_id, code)
+    except Exception as e:
+        logger.error_logger.warning(f"otp store unavailable: {e}")
+        raise HTTPException(status_code=503, detail="otp store unavailable")
 
 
 async def authenticate_user(db_conn: db_dependency, login: authentication.LoginSchema):
-    # get user
+    # returns (user, service_provider_id, verified)
     try:
-        user = await user_handler.get_user_by_email(db_conn=db_conn, email=login.email)
-        verified_password = verify_password(
+        user, service_provider_id, verified = (
+            await user_handler.get_login_user_by_email(
+                db_conn=db_conn, email=login.email
+            )
+        )
+        verified_password = await verify_password(
             plain_password=login.password, hashed_password=user.hashed_password
         )
         if not verified_password:
             raise HTTPException(status_code=400, detail="incorrect email or password")
-        return user
+        return user, service_provider_id, verified
     except error.NotFoundError:
         raise HTTPException(status_code=400, detail="incorrect email or password")
 
 
-async def login_response(user: orm_models.UserTableModel, db_conn: db_dependency):
-
-    service_provider_id = None
-    verified = False
-    if user.account_type == user_model.AccountType.service_provider:
-        service_provider = await service_provider_handler.get_service_by_user_id(
-            db_conn=db_conn, user_id=user.id
-        )
-        service_provider_id = service_provider.id
-        verified = service_provider.verified
+async def login_response(
+    user: orm_models.UserTableModel,
+    db_conn: db_dependency,
+    service_provider_id: UUID | None = None,
+    verified: bool = False,
+    activate: bool = False,
+):
+    is_active = user.is_active or activate
     access_token_data = token_models.AccessTokenEncode(
         id=str(user.id),
-        is_active=user.is_active,
+        is_active=is_active,
         role=user.role,
         service_provider_id=service_provider_id,
     )
 
     access_token = token_service.create_access_token(access_token_data.model_dump())
-    refresh_token = await token_service.create_refresh_token(
-        user_id=user.id, db_conn=db_conn
-    )
-    update_token = user_model.Update2faCode(
-        two_fa_auth_code=None, two_fa_auth_expiry_time=0
+    token_jit = await user_handler.start_login_session(
+        db_conn=db_conn, user_id=user.id, activate=activate
     )
-    _ = await user_handler.update_user_by_id(
-        db_conn=db_conn, user_id=user.id, values=update_token
+    refresh_token = await token_service.issue_refresh_token(
+        token_models.RefreshTokenDataEncode(
+            id=user.id,
+            is_active=is_active,
+            role=user.role,
+            service_provider_id=service_provider_id,
+            token_jit=token_jit,
+        ),
+        stored=True,
     )
 
     return authentication.LoginResponse(
@@ -97,27 +99,27 @@ async def login_response(user: orm_models.UserTableModel, db_conn: db_dependency
         access_token=access_token,
         refresh_token=refresh_token,
         role=user.role,
-        is_active=user.is_active,
+        is_active=is_active,
         account_type=user.account_type,
         verified=verified,
     )
 
 
 async def verify_OTP(db_conn: db_dependency, details: user_model.VerifyOTP):
-    user = await user_handler.get_user_by_email(db_conn=db_conn, email=details.email)
+    user, service_provider_id, verified = await user_handler.get_login_user_by_email(
+        db_conn=db_conn, email=details.email
+    )
     if user:
 
-        if (user.two_fa_auth_code == details.otp) and (
-            user.two_fa_auth_expiry_time > int(time.time())
-        ):
-
-            update_token = user_model.UpdateUserProfile(
-                is_active=True, two_fa_auth_expiry_time=0
-            )
-            _ = await user_handler.update_user_by_id(
-                db_conn=db_conn, user_id=user.id, values=update_token
+        if await check_otp(OTPPurpose.two_factor, user.id, details.otp):
+            # activation rides on the login write
+            return await login_response(
+                db_conn=db_conn,
+                user=user,
+                service_provider_id=service_provider_id,
+                verified=verified,
+                activate=True,
             )
-            return await login_response(db_conn=db_conn, user=user)
     # check otp expiration
 
     raise HTTPException(400, detail="incorrect or expired otp")
@@ -129,13 +131,9 @@ async def token(
     db_conn: db_dependency,
 ):
     login_data = authentication.LoginSchema(email=email, password=password)
-    user_data = await authenticate_user(db_conn=db_conn, login=login_data)
-    service_provider_id = None
-    if user_data.account_type == user_model.AccountType.service_provider:
-        service_provider = await service_provider_handler.get_service_by_user_id(
-            db_conn=db_conn, user_id=user_data.id
-        )
-        service_provider_id = service_provider.id
+    user_data, service_provider_id, _ = await authenticate_user(
+        db_conn=db_conn, login=login_data
+    )
     token_model = token_models.AccessTokenEncode(
         id=str(user_data.id),
         is_active=user_data.is_active,
@@ -152,30 +150,38 @@ async def token(
 
 
 async def resend_2fa_code(
-    email: str, db_conn: db_dependency, subject: str = "two factor authentication"
+    email: str,
+    db_conn: db_dependency,
+    subject: str = "two factor authentication",
+    purpose: OTPPurpose = OTPPurpose.two_factor,
 ):
     try:
         user = await user_handler.get_user_by_email(db_conn=db_conn, email=email)
         if user:
             code = generate_2fa_code()
-
-            update_token = user_model.Update2faCode(
-                two_fa_auth_code=code, two_fa_auth_expiry_time=int(time.time()) + 300
-            )
-            updated_user = await user_handler.update_user_by_id(
-                db_conn=db_conn, user_id=user.id, values=update_token
-            )
-            if updated_user:
-                email_schema = email_model.EmailSchema(
-                    subject=subject, recipients=[user.email]
+            try:
+                retry_after = await otp_store.start_cooldown(purpose, user.id)
+                if not retry_after:
+                    await otp_store.store(purpose, user.id, code)
+            except Exception as e:
+                logger.error_logger.warning(f"otp store unavailable: {e}")
+                raise HTTPException(status_code=503, detail="otp store unavailable")
+            if retry_after:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="a code was sent recently, try again shortly",
+                    headers={"Retry-After": str(retry_after)},
                 )
+            email_schema = email_model.EmailSchema(
+                subject=subject, recipients=[user.email]
+            )
 
-                # send email
-                await authorizationcode_email.send_email(
-                    passcode=code,
-                    email=email_schema,
-                    template_name=email_model.EmailTemplates.TWO_FACTOR_AUTHENTICATION,
-                )
+            # send email
+            await authorizationcode_email.send_email(
+                passcode=code,
+                email=email_schema,
+                template_name=email_model.EmailTemplates.TWO_FACTOR_AUTHENTICATION,
+            )
 
     except error.NotFoundError:
         raise HTTPException(status_code=400, detail="incorrect email or password")
@@ -186,20 +192,12 @@ async def reset_password(
 ):
     user = await user_handler.get_user_by_email(db_conn=db_conn, email=email)
     if user:
-        if user.two_fa_auth_code == OTP and user.two_fa_auth_expiry_time > int(
-            time.time()
-        ):
-            hashed_password = hash_password(new_password)
+        if await check_otp(OTPPurpose.password_reset, user.id, OTP):
+            hashed_password = await hash_password(new_password)
             update_token = user_model.UpdateUserProfile(hashed_password=hashed_password)
             _ = await user_handler.update_user_by_id(
                 db_conn=db_conn, user_id=user.id, values=update_token
             )
-            update_token = user_model.Update2faCode(
-                two_fa_auth_code=None, two_fa_auth_expiry_time=int(time.time())
-            )
-            _ = await user_handler.update_user_by_id(
-                db_conn=db_conn, user_id=user.id, values=update_token
-            )
             return authentication.SuccessfulResponse()
         raise HTTPException(status_code=400, detail=f"incorrect or expired OTP")
 
@@ -208,11 +206,18 @@ async def reset_password(
 
 async def login(login: authentication.LoginSchema, db_conn: db_dependency):
     try:
-        user = await authenticate_user(db_conn=db_conn, login=login)
+        user, service_provider_id, verified = await authenticate_user(
+            db_conn=db_conn, login=login
+        )
         if user.two_fa:
             await resend_2fa_code(email=login.email, db_conn=db_conn)
             return authentication.TwoFAResponse()
-        return await login_response(db_conn=db_conn, user=user)
+        return await login_response(
+            db_conn=db_conn,
+            user=user,
+            service_provider_id=service_provider_id,
+            verified=verified,
+        )
 
     except error.NotFoundError:
         raise HTTPException(status_code=400, detail="incorrect email or password")
@@ -226,7 +231,7 @@ async def create_user(
     try:
         _ = await user_handler.get_user_by_email(email=user_data.email, db_conn=db_conn)
     except error.NotFoundError:
-        hashed_password = hash_password(user_data.hashed_password)
+        hashed_password = await hash_password(user_data.hashed_password)
         referral_code = referal_service.generate_code()
 
         _ = await user_handler.create_user(
@@ -256,12 +261,17 @@ async def verify_google_token(token: str) -> authentication.OpenIDUserDataModel:
         HTTPException: If the token is invalid or verification fails.
     """
     try:
-        # Verify the token against Google's servers
-        id_info = id_token.verify_token(token, google_oauth_request.Request())
+        # signature checked locally against the cached Google keys
+        id_info = await google_id_token.verify_google_id_token(
+            token, audience=google_id_token.client_ids()
+        )
 
         # Check if the token is valid and intended for our application
         if not id_info:
             raise ValueError("Invalid token.")
+        # an unverified address could belong to someone else's account
+        if id_info.get("email_verified") not in (True, "true"):
+            raise ValueError("Google account email is not verified.")
 
         # Extract user information from the token
         user_info = authentication.OpenIDUserDataModel(
@@ -323,12 +333,44 @@ async def process_google_token_login(
             account_type=db_user.account_type,
         )
 
+    except ValueError as e:
+        # the token failed verification: signature, audience or email
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid Google ID token: {e}",
+        )
     except Exception as e:
         logger.error_logger.error(f"Error during Google token login: {e}")
         raise HTTPException(status_code=500, detail=f"Google token login failed: {e}")
 
 
-async def logout(user_id: UUID, db_conn: db_dependency):
+async def logout(
+    user_id: UUID, db_conn: db_dependency, refresh_token: str | None = None
+):
+    # with the device's refresh token only that session ends
+    if refresh_token is None:
+        return await logout_everywhere(user_id=user_id, db_conn=db_conn)
+    token_data = await token_service.decode_refresh_token(token=refresh_token)
+    if token_data.id != user_id or token_data.token_jit is None:
+        raise HTTPException(status_code=400, detail="invalid refresh token")
+    try:
+        state = await sessions.revoke(user_id, token_data.token_jit)
+    except Exception as e:
+        logger.error_logger.warning(f"session store unavailable: {e}")
+        raise HTTPException(status_code=503, detail="session store unavailable")
+    # an unknown jit may only live in postgres (issued while redis was down)
+    if state is None or state == sessions.LIVE_STORED:
+        await user_handler.clear_token_jit(
+            db_conn=db_conn, user_id=user_id, token_jit=token_data.token_jit
+        )
+
+
+async def logout_everywhere(user_id: UUID, db_conn: db_dependency):
+    try:
+        await sessions.revoke_all(user_id)
+    except Exception as e:
+        logger.error_logger.warning(f"session store unavailable: {e}")
+        raise HTTPException(status_code=503, detail="session store unavailable")
     try:
         _ = await user_handler.update_user_by_id(
             db_conn=db_conn,
@@ -349,7 +391,7 @@ async def change_password(
     # verify the old password
     try:
         user_data = await user_handler.get_user_by_id(user_id=user_id, db_conn=db_conn)
-        if not verify_password(
+        if not await verify_password(
             plain_password=old_password,
             hashed_password=user_data.hashed_password,
         ):
@@ -358,7 +400,7 @@ async def change_password(
                 detail="old password is incorrect",
             )
         # update password
-        hashed_password = hash_password(new_password)
+        hashed_password = await hash_password(new_password)
         password_updated = user_model.UpdateUserProfile(hashed_password=hashed_password)
         updated_user = await user_handler.update_user_by_id(
             db_conn=db_conn, user_id=user_id, values=password_updated
@@ -1,8 +1,12 @@
 from typing import Annotated, Optional
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
-from src.services.token import verify_access_token
+from starlette.requests import HTTPConnection
+from src.services.token import get_access_token_data
 from src.models import token_models
+from src.models.orm_models import UserTableModel
+from src.database.handlers import user_handler
+from src.root.database import db_dependency
 from fastapi import WebSocket, Query, Header, HTTPException, WebSocketException, status
 
 oauth2_Scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", scheme_name="users")
@@ -11,38 +15,99 @@ oauth2_Scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", scheme_name=
 #     if token_data.
 
 
-def get_user_verification_service(
-    token: Annotated[str, Depends(oauth2_Scheme)],
+class Principal:
+    """
+    The caller of one request: its access token's claims, with the
+    provider view and user row built on first use and kept for the rest
+    of the request. Lives on request.state, so every dependency and
+    service handling the request shares one.
+    """
+
+    def __init__(self, token_data: token_models.AccessTokenData):
+        self.token_data = token_data
+        self._provider: token_models.ProviderAccessTokenData | None = None
+        self._user: UserTableModel | None = None
+
+    @property
+    def id(self):
+        return self.token_data.id
+
+    @property
+    def provider(self) -> token_models.ProviderAccessTokenData:
+        if self._provider is None:
+            if not self.token_data.service_provider_id:
+                raise HTTPException(
+                    status_code=403, detail="User is not a service provider"
+                )
+            self._provider = token_models.ProviderAccessTokenData.model_validate(
+                self.token_data
+            )
+        return self._provider
+
+    async def get_user(self, db_conn: db_dependency) -> UserTableModel:
+        # raises NotFoundError like user_handler.get_user_by_id
+        if self._user is None:
+            self._user = await user_handler.get_user_by_id(
+                db_conn=db_conn, user_id=self.id
+            )
+        return self._user
+
+
+def resolve_principal(connection: HTTPConnection, token: str) -> Principal:
+    principal = getattr(connection.state, "principal", None)
+    if principal is None:
+        principal = Principal(get_access_token_data(token))
+        connection.state.principal = principal
+    return principal
+
+
+async def get_principal(
+    request: Request, token: Annotated[str, Depends(oauth2_Scheme)]
+) -> Principal:
+    # async so the cached lookup runs on the event loop, not a thread hop
+    return resolve_principal(request, token)
+
+
+async def get_user_verification_service(
+    principal: Annotated[Principal, Depends(get_principal)],
 ) -> token_models.AccessTokenData:
     """
     Dependency to get the current user's data from the access token.
     Raises HTTPException if the token is invalid or expired.
     """
-    payload = verify_access_token(token)
-    token_data = token_models.AccessTokenData.model_validate(payload)
-    return token_data
+    return principal.token_data
 
 
-def get_business_verification_service(
-    token: Annotated[str, Depends(get_user_verification_service)],
+async def get_business_verification_service(
+    principal: Annotated[Principal, Depends(get_principal)],
 ) -> token_models.ProviderAccessTokenData:
     """
     Dependency to get the current business user's data from the access token.
     Raises HTTPException if the token is invalid or expired.
     """
-    token_data = token_models.ProviderAccessTokenData.model_validate(token)
-    if token_data.service_provider_id:
-        return token_data
-    raise HTTPException(status_code=403, detail="User is not a service provider")
+    return principal.provider
 
 
-async def get_user_verification_service_ws(
+def get_admin_verification_service(
+    token: Annotated[
+        token_models.AccessTokenData, Depends(get_user_verification_service)
+    ],
+) -> token_models.AccessTokenData:
+    """
+    Dependency that only lets admin users through.
+    """
+    if token.role == token_models.Roles.ADMIN:
+        return token
+    raise HTTPException(status_code=403, detail="User is not an admin")
+
+
+async def get_principal_ws(
     websocket: WebSocket,
     query_param_token: Optional[str] = Query(None, alias="token"),
     authorization_header: Optional[str] = Header(None, alias="Authorization"),
-) -> token_models.AccessTokenData:
+) -> Principal:
     """
-    Dependency to get the current user's data for WebSocket connections.
+    Dependency to get the current user for WebSocket connections.
     Extracts token from query parameter or Authorization header.
     Raises WebSocketException if the token is invalid, missing, or expired.
     """
@@ -68,11 +133,7 @@ async def get_user_verification_service_ws(
         )
 
     try:
-        payload = verify_access_token(token_str)
-        print(payload)
-
-        token_data = token_models.AccessTokenData.model_validate(payload)
-        return token_data
+        return resolve_principal(websocket, token_str)
     except HTTPException as e:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION,
@@ -82,3 +143,9 @@ async def get_user_verification_service_ws(
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION, reason="Token verification failed"
         )
+
+
+async def get_user_verification_service_ws(
+    principal: Annotated[Principal, Depends(get_principal_ws)],
+) -> token_models.AccessTokenData:
+    return principal.token_data
@@ -0,0 +1,241 @@
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from cachetools import LRUCache
+from fastapi import HTTPException
+
+from src.custom_exceptions import error
+from src.database.handlers import bookings_handler, service_provider_handler
+from src.models import bookings_model
+from src.root.database import db_dependency
+
+MAX_RANGE_DAYS = 31
+DEFAULT_DURATION_MINUTES = 60
+# bookings cannot be longer than this (see CreateBookingModel)
+MAX_DURATION = timedelta(minutes=720)
+TEMPLATE_CACHE_SIZE = 4096
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M%p", "%I:%M %p", "%I%p", "%I %p")
+
+# (provider_id, last_updated) -> per-weekday opening windows in minutes,
+# so any edit to the provider row invalidates its entry
+template_cache: LRUCache = LRUCache(maxsize=TEMPLATE_CACHE_SIZE)
+
+
+def _parse_minutes(value) -> int | None:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip().upper()
+    if value in ("24:00", "24:00:00"):
+        return 24 * 60
+    for time_format in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, time_format)
+        except ValueError:
+            continue
+        return parsed.hour * 60 + parsed.minute
+    return None
+
+
+def compile_weekly_template(opening_hours: dict | None) -> tuple:
+    """
+    Turns opening_hours ({"Monday": {"open": "09:00", "close": "17:00"}, ...})
+    into a 7-tuple, Monday first, of (open, close) minute windows. Days that
+    are missing or unparsable are closed; a close at or before the open
+    runs to midnight.
+    """
+    if not isinstance(opening_hours, dict):
+        return ((),) * 7
+    # some clients send the example payload wrapped in its field name
+    opening_hours = opening_hours.get("opening_hours", opening_hours)
+    by_day = {str(day).strip().lower(): hours for day, hours in opening_hours.items()}
+
+    template = []
+    for weekday in WEEKDAYS:
+        hours = by_day.get(weekday)
+        if not isinstance(hours, dict):
+            template.append(())
+            continue
+        opens = _parse_minutes(hours.get("open"))
+        closes = _parse_minutes(hours.get("close"))
+        if opens is None or closes is None:
+            template.append(())
+            continue
+        if closes <= opens:
+            closes = 24 * 60
+        template.append(((opens, closes),))
+    return tuple(template)
+
+
+def merge_intervals(intervals: list[tuple[datetime, datetime]]):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    window: tuple[datetime, datetime],
+    busy: list[tuple[datetime, datetime]],
+    first_busy: int = 0,
+):
+    """
+    Returns the free parts of `window` given merged, sorted `busy`
+    intervals, and the index to resume from for the next (later) window.
+    """
+    window_start, window_end = window
+    free = []
+    cursor = window_start
+    index = first_busy
+    while index < len(busy) and busy[index][1] <= window_start:
+        index += 1
+    resume = index
+    while index < len(busy) and busy[index][0] < window_end:
+        busy_start, busy_end = busy[index]
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+        index += 1
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return free, resume
+
+
+def _wall_clock(midnight: datetime, minutes: int) -> datetime:
+    # 24:00 is the next day's midnight, which may have its own utc offset
+    day, minutes = divmod(minutes, 24 * 60)
+    local = datetime.combine(
+        midnight.date() + timedelta(days=day),
+        time(minutes // 60, minutes % 60),
+        tzinfo=midnight.tzinfo,
+    )
+    return local.astimezone(timezone.utc)
+
+
+def compute_slots(
+    template: tuple,
+    busy: list[tuple[datetime, datetime]],
+    start_date: date,
+    end_date: date,
+    slot_minutes: int,
+    tz: ZoneInfo,
+    now: datetime,
+) -> list[bookings_model.DayAvailability]:
+    step = timedelta(minutes=slot_minutes)
+    days = []
+    busy_index = 0
+    day = start_date
+    while day <= end_date:
+        midnight = datetime.combine(day, time(), tzinfo=tz)
+        slots = []
+        for opens, closes in template[day.weekday()]:
+            # opening hours are wall-clock times in `tz`; stepping happens in
+            # utc, where aware arithmetic is exact, so a dst change shortens
+            # or lengthens the window instead of repeating or skipping slots
+            window_start = _wall_clock(midnight, opens)
+            window_end = _wall_clock(midnight, closes)
+            free, busy_index = subtract_intervals(
+                (window_start, window_end), busy, busy_index
+            )
+            for free_start, free_end in free:
+                # keep slots on the window's grid (9:00, 10:00, ...)
+                offset = math.ceil((free_start - window_start) / step)
+                slot_start = window_start + offset * step
+                while slot_start + step <= free_end:
+                    if slot_start >= now:
+                        slots.append(
+                            bookings_model.AvailabilitySlot(
+                                start=slot_start.astimezone(tz),
+                                end=(slot_start + step).astimezone(tz),
+                            )
+                        )
+                    slot_start += step
+        days.append(bookings_model.DayAvailability(day=day, slots=slots))
+        day += timedelta(days=1)
+    return days
+
+
+async def _get_weekly_template(db_conn: db_dependency, provider_id: UUID) -> tuple:
+    last_updated = await service_provider_handler.get_service_provider_last_updated(
+        db_conn=db_conn, service_provider_id=provider_id
+    )
+    key = (provider_id, last_updated)
+    template = template_cache.get(key)
+    if template is None:
+        opening_hours = (
+            await service_provider_handler.get_service_provider_opening_hours(
+                db_conn=db_conn, service_provider_id=provider_id
+            )
+        )
+        template = template_cache[key] = compile_weekly_template(opening_hours)
+    return template
+
+
+async def get_provider_availability(
+    db_conn: db_dependency,
+    provider_id: UUID,
+    start_date: date,
+    end_date: date | None = None,
+    slot_minutes: int = DEFAULT_DURATION_MINUTES,
+    tz_name: str = "UTC",
+) -> list[bookings_model.DayAvailability]:
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"date range is limited to {MAX_RANGE_DAYS} days",
+        )
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="unknown timezone")
+
+    try:
+        template = await _get_weekly_template(db_conn=db_conn, provider_id=provider_id)
+    except error.NotFoundError:
+        raise HTTPException(status_code=404, detail="service provider not found")
+    range_start = datetime.combine(start_date, time(), tzinfo=tz)
+    range_end = datetime.combine(end_date + timedelta(days=1), time(), tzinfo=tz)
+    bookings = await bookings_handler.get_provider_booked_intervals(
+        db_conn=db_conn,
+        service_provider_id=provider_id,
+        start=range_start,
+        end=range_end,
+        max_duration=MAX_DURATION,
+    )
+    busy = merge_intervals(
+        [
+            (
+                scheduled_date,
+                scheduled_date
+                + timedelta(minutes=duration_minutes or DEFAULT_DURATION_MINUTES),
+            )
+            for scheduled_date, duration_minutes in bookings
+        ]
+    )
+    return compute_slots(
+        template=template,
+        busy=busy,
+        start_date=start_date,
+        end_date=end_date,
+        slot_minutes=slot_minutes,
+        tz=tz,
+        now=datetime.now(timezone.utc),
+    )
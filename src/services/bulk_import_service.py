@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+from typing import Iterable, Iterator
+
+import numpy as np
+import shapely
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from src.database import geohash, search_cache, search_index, search_index_sync
+from src.database.handlers import bulk_import_handler
+from src.models import service_provider_model
+from src.root import catalog
+from src.root.database import engine
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+# csv cells holding several values, e.g. "Plumbing|Electrical"
+CSV_LIST_FIELDS = ("category", "tags")
+CSV_JSON_FIELDS = ("opening_hours", "services_provided", "address")
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[dict]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # left for validation to reject and report
+            yield line
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[dict]:
+    for row in csv.DictReader(lines):
+        record = {key: value for key, value in row.items() if value not in ("", None)}
+        for field in CSV_LIST_FIELDS:
+            if field in record:
+                record[field] = [
+                    value.strip() for value in record[field].split("|") if value.strip()
+                ]
+        for field in CSV_JSON_FIELDS:
+            if field in record:
+                try:
+                    record[field] = json.loads(record[field])
+                except json.JSONDecodeError:
+                    pass
+        yield record
+
+
+def _dumps(value):
+    return None if value is None else json.dumps(value)
+
+
+def build_chunk_rows(
+    records: list[service_provider_model.BulkProviderRecord],
+) -> tuple[list[tuple], list[tuple]]:
+    provider_rows = [
+        (
+            record.id,
+            record.user_id,
+            record.name,
+            record.bio,
+            record.category,
+            catalog.category_ids(record.category),
+            record.tags,
+            record.zip_code,
+            _dumps(record.opening_hours),
+            _dumps(record.services_provided),
+            _dumps(
+                [address.model_dump() for address in record.address]
+                if record.address is not None
+                else None
+            ),
+            record.is_active,
+            record.verified,
+            False,
+        )
+        for record in records
+    ]
+
+    located = [
+        record
+        for record in records
+        if record.longitude is not None and record.latitude is not None
+    ]
+    if not located:
+        return provider_rows, []
+
+    # build every point of the chunk in one vectorised call
+    points = shapely.set_srid(
+        shapely.points(
+            np.array([(record.longitude, record.latitude) for record in located])
+        ),
+        4326,
+    )
+    point_wkbs = shapely.to_wkb(points, include_srid=True)
+    location_rows = [
+        (uuid.uuid4(), record.id, record.longitude, record.latitude, point_wkb)
+        for record, point_wkb in zip(located, point_wkbs)
+    ]
+    return provider_rows, location_rows
+
+
+def _report_error(report, message: str):
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(message)
+
+
+def _chunks(raw_records: Iterable[dict], chunk_size: int, report):
+    chunk = []
+    for line_number, raw_record in enumerate(raw_records, start=1):
+        try:
+            chunk.append(
+                service_provider_model.BulkProviderRecord.model_validate(raw_record)
+            )
+        except ValidationError as e:
+            report.skipped += 1
+            _report_error(report, f"record {line_number}: {e.errors()[0]['msg']}")
+            continue
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _load_chunk(
+    asyncpg_connection,
+    chunk: list[service_provider_model.BulkProviderRecord],
+    report,
+) -> list[service_provider_model.BulkProviderRecord]:
+    missing = await bulk_import_handler.missing_user_ids(
+        asyncpg_connection, {record.user_id for record in chunk}
+    )
+    if missing:
+        for user_id in missing:
+            _report_error(report, f"user {user_id} does not exist")
+        report.skipped += sum(record.user_id in missing for record in chunk)
+        chunk = [record for record in chunk if record.user_id not in missing]
+        if not chunk:
+            return chunk
+
+    provider_rows, location_rows = await run_in_threadpool(build_chunk_rows, chunk)
+    await bulk_import_handler.copy_providers_and_locations(
+        asyncpg_connection,
+        provider_rows=provider_rows,
+        location_rows=location_rows,
+    )
+    report.providers += len(provider_rows)
+    report.locations += len(location_rows)
+    return chunk
+
+
+async def import_providers(
+    raw_records: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> service_provider_model.BulkImportReport:
+    """
+    Streams provider records into service_providers and locations with
+    COPY, one transaction per chunk. A failing chunk rolls back on its own
+    and is reported as skipped; chunks already loaded stay committed.
+    Reading, parsing and validation run in the threadpool.
+    """
+    report = service_provider_model.BulkImportReport()
+    touched_cells = set()
+    started = time.perf_counter()
+    chunks = _chunks(raw_records, chunk_size, report)
+
+    try:
+        async with engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            asyncpg_connection = raw_connection.driver_connection
+            chunk_number = 0
+            while chunk := await run_in_threadpool(next, chunks, None):
+                chunk_number += 1
+                try:
+                    chunk = await _load_chunk(asyncpg_connection, chunk, report)
+                except Exception as e:
+                    report.skipped += len(chunk)
+                    _report_error(report, f"chunk {chunk_number}: {e}")
+                    continue
+
+                for record in chunk:
+                    search_index.provider_index.update_provider(
+                        provider_id=record.id,
+                        category=record.category,
+                        online_status=False,
+                        verified=record.verified,
+                    )
+                    if record.latitude is not None and record.longitude is not None:
+                        search_index.provider_index.upsert_location(
+                            provider_id=record.id,
+                            latitude=record.latitude,
+                            longitude=record.longitude,
+                        )
+                        touched_cells.add(
+                            geohash.encode(
+                                record.latitude,
+                                record.longitude,
+                                search_cache.INVALIDATION_PRECISION,
+                            )
+                        )
+    finally:
+        # chunks committed before a failure are already visible; one reload
+        # on the other workers instead of a message per provider
+        await search_index_sync.request_reload()
+        await search_cache.invalidate_cells(
+            [search_cache.GLOBAL_SET]
+            + [f"{search_cache.CELL_PREFIX}:{cell}" for cell in touched_cells]
+        )
+    report.seconds = time.perf_counter() - started
+    if report.seconds > 0:
+        report.rows_per_second = (report.providers + report.locations) / report.seconds
+    return report
+
+
+def parse_records(lines: Iterable[str], file_format: str) -> Iterator[dict]:
+    if file_format == "csv":
+        return parse_csv(lines)
+    return parse_ndjson(lines)
+
+
+async def import_upload(
+    upload: UploadFile, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> service_provider_model.BulkImportReport:
+    file_format = "csv" if (upload.filename or "").endswith(".csv") else "ndjson"
+    lines = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+    return await import_providers(
+        parse_records(lines, file_format), chunk_size=chunk_size
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk import service providers from NDJSON or CSV"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    with open(args.path, "r", newline="", encoding="utf-8") as file:
+        report = await import_providers(
+            parse_records(file, file_format), chunk_size=args.chunk_size
+        )
+    await engine.dispose()
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
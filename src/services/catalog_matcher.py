@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from rapidfuzz import fuzz, process, utils
+
+from src.models import service_provider_model
+from src.root import catalog
+
+DEFAULT_SCORE_CUTOFF = 60.0
+QUERY_CACHE_SIZE = 2048
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogEntry:
+    id: str
+    name: str
+    kind: str
+    category_id: str
+    category: str
+
+
+class CatalogMatcher:
+    """
+    Fuzzy lookup over every category and service name in the catalog. The
+    names are normalised once up front, so a query costs one normalisation
+    plus a single rapidfuzz pass over ~140 short strings.
+    """
+
+    def __init__(self, categories: list[dict]):
+        self.entries: list[CatalogEntry] = []
+        for category in categories:
+            self.entries.append(
+                CatalogEntry(
+                    id=category["id"],
+                    name=category["category"],
+                    kind="category",
+                    category_id=category["id"],
+                    category=category["category"],
+                )
+            )
+            for service in category["services"]:
+                self.entries.append(
+                    CatalogEntry(
+                        id=service["id"],
+                        name=service["name"],
+                        kind="service",
+                        category_id=category["id"],
+                        category=category["category"],
+                    )
+                )
+        self.choices = [utils.default_process(entry.name) for entry in self.entries]
+
+    def match(
+        self, query: str, limit: int, score_cutoff: float = DEFAULT_SCORE_CUTOFF
+    ) -> list[service_provider_model.CatalogMatch]:
+        results = process.extract(
+            utils.default_process(query),
+            self.choices,
+            scorer=fuzz.WRatio,
+            processor=None,
+            limit=limit,
+            score_cutoff=score_cutoff,
+        )
+        return [
+            service_provider_model.CatalogMatch(
+                id=self.entries[index].id,
+                name=self.entries[index].name,
+                kind=self.entries[index].kind,
+                category_id=self.entries[index].category_id,
+                category=self.entries[index].category,
+                score=score,
+            )
+            for _, score, index in results
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_matcher() -> CatalogMatcher:
+    return CatalogMatcher(catalog.load_catalog())
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_match(normalized_query: str, limit: int) -> tuple:
+    return tuple(get_matcher().match(normalized_query, limit=limit))
+
+
+def match_catalog(
+    query: str, limit: int = 5
+) -> list[service_provider_model.CatalogMatch]:
+    # typed queries repeat a lot ("plum", "plumb", ...), memoise on the
+    # normalised form
+    return list(_cached_match(catalog.normalize_name(query), limit))
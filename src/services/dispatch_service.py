@@ -0,0 +1,294 @@
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import numpy as np
+
+from src.database import geohash, presence, search_index
+from src.database.handlers import bookings_handler
+from src.models import bookings_model
+from src.root import catalog, logger
+from src.root.database import SessionLocal, db_dependency
+from src.root.redis_database import redis_client
+
+DISPATCH_WINDOW_SECONDS = 2
+DISPATCH_RADIUS_METERS = 10000
+MAX_BATCH_SIZE = 500
+# an offer is the booking row itself (OFFERED, service_provider_id set);
+# providers poll GET /providers/quick-fix/offers for theirs
+OFFER_TTL_SECONDS = 60
+# providers that let an offer for a booking lapse are not offered it again
+EXCLUDED_PREFIX = "dispatch:excluded"
+EXCLUDED_TTL_SECONDS = 3600
+# nearest providers considered per request when assigning a batch
+CANDIDATES_PER_REQUEST = 32
+
+stats = {"batches": 0, "requests": 0, "offers": 0, "expired": 0}
+
+
+def haversine_matrix(
+    latitudes_1: np.ndarray,
+    longitudes_1: np.ndarray,
+    latitudes_2: np.ndarray,
+    longitudes_2: np.ndarray,
+) -> np.ndarray:
+    # (n, m) great-circle distances in meters between two sets of points
+    phi_1 = np.radians(latitudes_1)[:, None]
+    phi_2 = np.radians(latitudes_2)[None, :]
+    d_phi = phi_2 - phi_1
+    d_lambda = np.radians(longitudes_2)[None, :] - np.radians(longitudes_1)[:, None]
+    a = (
+        np.sin(d_phi / 2) ** 2
+        + np.cos(phi_1) * np.cos(phi_2) * np.sin(d_lambda / 2) ** 2
+    )
+    return 2 * geohash.EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def greedy_assign(
+    costs: np.ndarray, candidates: int = CANDIDATES_PER_REQUEST
+) -> list[tuple[int, int]]:
+    """
+    One-to-one assignment of rows to columns, cheapest pairs first, looking
+    only at each row's `candidates` cheapest columns. Pairs with an infinite
+    cost are never assigned; rows left over wait for the next window.
+    """
+    if costs.shape[1] > candidates:
+        columns = np.argpartition(costs, candidates - 1, axis=1)[:, :candidates]
+    else:
+        columns = np.broadcast_to(np.arange(costs.shape[1]), costs.shape)
+    rows = np.broadcast_to(np.arange(costs.shape[0])[:, None], columns.shape)
+    pair_costs = costs[rows, columns].ravel()
+    finite = np.isfinite(pair_costs)
+    rows, columns = rows.ravel()[finite], columns.ravel()[finite]
+    order = np.argsort(pair_costs[finite], kind="stable")
+
+    taken_rows, taken_columns = set(), set()
+    assignments = []
+    for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+        if row in taken_rows or column in taken_columns:
+            continue
+        taken_rows.add(row)
+        taken_columns.add(column)
+        assignments.append((row, column))
+    return assignments
+
+
+def _request_categories(services_requested) -> list[str]:
+    # catalog category and service ids (or names) of the requested services,
+    # in any of the forms catalog.validate_services accepts
+    categories = []
+    if isinstance(services_requested, list):
+        services = services_requested
+    elif isinstance(services_requested, dict) and not (
+        "id" in services_requested or "name" in services_requested
+    ):
+        # {category: [services]}
+        registry = catalog.get_registry()
+        services = []
+        for category, items in services_requested.items():
+            category_id = registry.resolve_category(str(category))
+            if category_id is not None:
+                categories.append(category_id)
+            services.extend(items if isinstance(items, list) else [items])
+    else:
+        services = [services_requested]
+    for service in services:
+        if isinstance(service, dict):
+            categories.extend(
+                str(service[field]) for field in ("id", "name") if service.get(field)
+            )
+    return [category for category in categories if catalog.category_code(category)]
+
+
+def _search_box(latitudes: np.ndarray, longitudes: np.ndarray, radius: float):
+    # center and size in meters of a box holding every request's radius
+    meters_per_degree = math.radians(geohash.EARTH_RADIUS_METERS)
+    center_latitude = float((latitudes.min() + latitudes.max()) / 2)
+    center_longitude = float((longitudes.min() + longitudes.max()) / 2)
+    # a degree of longitude is widest at the latitude nearest the equator
+    if latitudes.min() <= 0 <= latitudes.max():
+        nearest_equator = 0.0
+    else:
+        nearest_equator = float(np.abs(latitudes).min())
+    height = float(latitudes.max() - latitudes.min()) * meters_per_degree
+    width = (
+        float(longitudes.max() - longitudes.min())
+        * meters_per_degree
+        * math.cos(math.radians(nearest_equator))
+    )
+    return center_latitude, center_longitude, width + 2 * radius, height + 2 * radius
+
+
+def match_batch(
+    requests: list[tuple[UUID, float, float, list[str]]],
+    providers: list[tuple[UUID, float, float]],
+    excluded: dict[UUID, set[UUID]],
+    radius: float = DISPATCH_RADIUS_METERS,
+) -> dict[UUID, UUID]:
+    """
+    Matches (booking_id, latitude, longitude, categories) requests to
+    (provider_id, latitude, longitude) providers in one pass and returns
+    booking_id -> provider_id.
+    """
+    if not requests or not providers:
+        return {}
+    costs = haversine_matrix(
+        np.array([request[1] for request in requests]),
+        np.array([request[2] for request in requests]),
+        np.array([provider[1] for provider in providers]),
+        np.array([provider[2] for provider in providers]),
+    )
+    costs[costs > radius] = np.inf
+
+    index = search_index.provider_index
+    masks = [
+        entry.category_mask if (entry := index.get(provider[0])) else 0
+        for provider in providers
+    ]
+    # masks only outgrow 64 bits with many categories outside the catalog
+    provider_masks = np.array(
+        masks, dtype=np.uint64 if max(masks) < 1 << 64 else object
+    )
+    offered = 0
+    for mask in masks:
+        offered |= mask
+    provider_columns = {
+        provider[0]: column for column, provider in enumerate(providers)
+    }
+    for row, (booking_id, _, _, categories) in enumerate(requests):
+        # bits no provider in the batch has cannot match anyone; dropping
+        # them keeps the mask within provider_masks' dtype
+        request_mask = index.category_mask(categories) & offered
+        if request_mask:
+            if provider_masks.dtype != object:
+                request_mask = np.uint64(request_mask)
+            no_match = (provider_masks & request_mask) == 0
+            costs[row, no_match.astype(bool)] = np.inf
+        elif categories:
+            # categories nobody in the batch offers
+            costs[row, :] = np.inf
+        for provider_id in excluded.get(booking_id, ()):
+            column = provider_columns.get(provider_id)
+            if column is not None:
+                costs[row, column] = np.inf
+
+    return {
+        requests[row][0]: providers[column][0] for row, column in greedy_assign(costs)
+    }
+
+
+async def _excluded_providers(booking_ids: list[UUID]) -> dict[UUID, set[UUID]]:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for booking_id in booking_ids:
+            pipe.smembers(f"{EXCLUDED_PREFIX}:{booking_id}")
+        members = await pipe.execute()
+    return {
+        booking_id: {UUID(member.decode()) for member in booking_members}
+        for booking_id, booking_members in zip(booking_ids, members)
+        if booking_members
+    }
+
+
+async def _exclude_providers(expired: list[tuple[UUID, UUID]]):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for booking_id, provider_id in expired:
+            key = f"{EXCLUDED_PREFIX}:{booking_id}"
+            pipe.sadd(key, str(provider_id))
+            pipe.expire(key, EXCLUDED_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def dispatch_once() -> int:
+    """
+    Runs one dispatch window: lapsed offers go back to the pool, then every
+    pending quick-fix booking this worker can lock is matched against the
+    live providers around the batch. Returns the number of offers made.
+    """
+    offered_before = datetime.now(timezone.utc) - timedelta(seconds=OFFER_TTL_SECONDS)
+    async with SessionLocal() as db_conn:
+        expired = await bookings_handler.expire_quick_fix_offers(
+            db_conn=db_conn, offered_before=offered_before
+        )
+        await db_conn.commit()
+        if expired:
+            stats["expired"] += len(expired)
+            await _exclude_providers(expired)
+
+        pending = await bookings_handler.lock_pending_quick_fix_bookings(
+            db_conn=db_conn, limit=MAX_BATCH_SIZE
+        )
+        requests = [
+            (
+                booking_id,
+                float(address["latitude"]),
+                float(address["longitude"]),
+                _request_categories(services_requested),
+            )
+            for booking_id, address, services_requested in pending
+            if address
+            and address.get("latitude") is not None
+            and address.get("longitude") is not None
+        ]
+        if not requests:
+            await db_conn.commit()
+            return 0
+
+        center_latitude, center_longitude, width, height = _search_box(
+            np.array([request[1] for request in requests]),
+            np.array([request[2] for request in requests]),
+            DISPATCH_RADIUS_METERS,
+        )
+        busy = await bookings_handler.get_offered_provider_ids(db_conn=db_conn)
+        providers = [
+            provider
+            for provider in await presence.live_in_box(
+                center_latitude, center_longitude, width, height
+            )
+            if provider[0] not in busy
+        ]
+        excluded = await _excluded_providers([request[0] for request in requests])
+        # numpy releases the GIL, keep a surge batch off the event loop
+        offers = await asyncio.to_thread(match_batch, requests, providers, excluded)
+
+        await bookings_handler.offer_bookings(db_conn=db_conn, offers=offers)
+        await db_conn.commit()
+
+    stats["batches"] += 1
+    stats["requests"] += len(requests)
+    stats["offers"] += len(offers)
+    return len(offers)
+
+
+async def get_offers(
+    db_conn: db_dependency, provider_id: UUID
+) -> list[bookings_model.QuickFixOffer]:
+    now = datetime.now(timezone.utc)
+    ttl = timedelta(seconds=OFFER_TTL_SECONDS)
+    offers = []
+    for booking in await bookings_handler.get_quick_fix_offers(
+        db_conn=db_conn, service_provider_id=provider_id
+    ):
+        # offered at last_updated; lapsed ones wait for the next window to
+        # be taken back
+        expires_at = booking.last_updated + ttl
+        if expires_at > now:
+            offers.append(
+                bookings_model.QuickFixOffer.model_validate(
+                    {**booking.as_dict(), "expires_at": expires_at}
+                )
+            )
+    return offers
+
+
+def get_stats() -> dict:
+    return dict(stats)
+
+
+async def dispatch_periodically(interval: float = DISPATCH_WINDOW_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await dispatch_once()
+        except Exception as e:
+            logger.error_logger.warning(f"quick fix dispatch failed: {e}")
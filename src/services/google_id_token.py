@@ -0,0 +1,133 @@
+import asyncio
+import re
+import time
+from typing import Iterable
+
+import httpx
+from jose import JWTError, jwt
+
+from src.root import logger
+from src.root.env_settings import env
+from src.root.http_client import http_client
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# used when the response carries no max-age
+DEFAULT_MAX_AGE_SECONDS = 3600
+# refetch this long before the keys expire, and no more often than this
+# when a token names a key we do not have yet
+REFRESH_MARGIN_SECONDS = 60
+MIN_REFETCH_SECONDS = 30
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def _max_age(cache_control: str | None) -> int:
+    match = MAX_AGE_PATTERN.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+
+
+class JWKSCache:
+    """
+    Process-wide copy of a JWKS document, kept for as long as the
+    server's Cache-Control allows. Token checks read the keys from memory
+    while refresh_periodically renews them; a check only fetches when
+    there are no keys yet, they went stale, or a token names a key that
+    was rotated in, and then at most every MIN_REFETCH_SECONDS.
+    """
+
+    def __init__(self, url: str, client: httpx.AsyncClient):
+        self.url = url
+        self.client = client
+        self.keys: dict[str, dict] = {}
+        self.expires_at = 0.0
+        self.attempted_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def refresh(self):
+        self.attempted_at = time.monotonic()
+        response = await self.client.get(self.url)
+        response.raise_for_status()
+        self.keys = {key["kid"]: key for key in response.json()["keys"]}
+        self.expires_at = time.monotonic() + _max_age(
+            response.headers.get("cache-control")
+        )
+
+    def _may_fetch(self) -> bool:
+        return (
+            not self.keys or time.monotonic() - self.attempted_at >= MIN_REFETCH_SECONDS
+        )
+
+    async def get_key(self, kid: str | None) -> dict:
+        stale = time.monotonic() >= self.expires_at or kid not in self.keys
+        if stale and self._may_fetch():
+            async with self.lock:
+                # another caller may have fetched while this one waited
+                if self._may_fetch():
+                    try:
+                        await self.refresh()
+                    except httpx.HTTPError as e:
+                        if not self.keys:
+                            raise ValueError("Google signing keys unavailable") from e
+                        logger.error_logger.warning(
+                            f"JWKS refresh failed, using cached keys: {e}"
+                        )
+        key = self.keys.get(kid)
+        if key is None:
+            raise ValueError("token signed with an unknown key")
+        return key
+
+    async def refresh_periodically(self):
+        while True:
+            try:
+                if time.monotonic() >= self.expires_at - REFRESH_MARGIN_SECONDS:
+                    await self.refresh()
+                delay = self.expires_at - REFRESH_MARGIN_SECONDS - time.monotonic()
+            except Exception as e:
+                logger.error_logger.warning(f"JWKS refresh failed: {e}")
+                delay = MIN_REFETCH_SECONDS
+            await asyncio.sleep(max(delay, MIN_REFETCH_SECONDS))
+
+
+google_keys = JWKSCache(env.GOOGLE_JWKS_URL, http_client)
+
+
+def client_ids() -> list[str]:
+    # the web client plus any mobile ones; tokens are minted per client
+    return [env.GOOGLE_CLIENT_ID] + [
+        client_id.strip()
+        for client_id in env.GOOGLE_MOBILE_CLIENT_IDS.split(",")
+        if client_id.strip()
+    ]
+
+
+async def verify_google_id_token(
+    token: str, audience: str | Iterable[str], keys: JWKSCache = google_keys
+) -> dict:
+    """
+    Checks a Google ID token's signature, expiry, issuer and audience
+    locally and returns its claims. `audience` is the client id, or ids,
+    the token must have been issued to. Raises ValueError for any token
+    that does not verify.
+    """
+    audiences = {audience} if isinstance(audience, str) else set(audience)
+    if not audiences:
+        raise ValueError("no audience to check the token against")
+    try:
+        header = jwt.get_unverified_header(token)
+        key = await keys.get_key(header.get("kid"))
+        # jose compares against a single audience, so aud is checked below
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[key.get("alg", "RS256")],
+            options={"verify_aud": False, "verify_at_hash": False},
+        )
+    except JWTError as e:
+        raise ValueError(f"invalid Google ID token: {e}") from e
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError("token was not issued by Google")
+    token_audiences = claims.get("aud")
+    if isinstance(token_audiences, str):
+        token_audiences = [token_audiences]
+    if not audiences.intersection(token_audiences or ()):
+        raise ValueError("token was issued to another client")
+    return claims
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.root.env_settings import env
+
+# recent samples kept for the percentiles in get_stats
+SAMPLE_SIZE = 1000
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"])
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt on a fixed set of threads; the bcrypt extension releases
+    the GIL, so hashes proceed in parallel without blocking the event loop.
+    Calls beyond the workers plus `max_queue` waiting are shed with a 503
+    straight away rather than queueing behind seconds of hashing.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self.in_flight = 0
+        self.counts = {"completed": 0, "rejected": 0}
+        self.queue_wait = deque(maxlen=SAMPLE_SIZE)
+        self.hash_time = deque(maxlen=SAMPLE_SIZE)
+
+    async def run(self, function: Callable, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.counts["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="server busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = function(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self.in_flight += 1
+        try:
+            result, waited, took = await asyncio.get_running_loop().run_in_executor(
+                self.executor, timed
+            )
+        finally:
+            self.in_flight -= 1
+        self.counts["completed"] += 1
+        self.queue_wait.append(waited)
+        self.hash_time.append(took)
+        return result
+
+    def get_stats(self) -> dict:
+        stats = {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            **self.counts,
+        }
+        for name, samples in (
+            ("queue_wait_ms", self.queue_wait),
+            ("hash_time_ms", self.hash_time),
+        ):
+            if samples:
+                p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+                stats[name] = {
+                    "p50": round(float(p50), 2),
+                    "p95": round(float(p95), 2),
+                    "p99": round(float(p99), 2),
+                }
+        return stats
+
+
+hash_pool = PasswordHashPool(
+    workers=env.PASSWORD_HASH_WORKERS, max_queue=env.PASSWORD_HASH_MAX_QUEUE
+)
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+def get_stats() -> dict:
+    return hash_pool.get_stats()
+
+
+def shutdown():
+    hash_pool.executor.shutdown(wait=False, cancel_futures=True)
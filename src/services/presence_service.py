@@ -0,0 +1,139 @@
+import asyncio
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from src.database import presence, search_cache, search_index
+from src.database.handlers import locations_handler, service_provider_handler
+from src.models import responses, service_provider_model
+from src.root import logger
+from src.root.database import SessionLocal, db_dependency
+
+PRESENCE_FLUSH_SECONDS = 5
+
+# provider id -> latest online_status not yet written to postgres. A later
+# toggle overwrites an earlier one, so a provider flapping between flushes
+# still costs a single row update
+pending_statuses: dict[UUID, bool] = {}
+
+
+def _record_status(provider_id: UUID, online_status: bool):
+    pending_statuses[provider_id] = online_status
+    search_index.provider_index.update_provider(
+        provider_id=provider_id, online_status=online_status
+    )
+
+
+def _resolve_location(
+    provider_id: UUID, coordinates: service_provider_model.Coordinates | None
+) -> tuple[float, float] | None:
+    if coordinates is not None:
+        return coordinates.latitude, coordinates.longitude
+    entry = search_index.provider_index.get(provider_id)
+    if entry is not None and entry.latitude is not None:
+        return entry.latitude, entry.longitude
+    return None
+
+
+async def heartbeat(
+    provider_id: UUID, values: service_provider_model.PresenceHeartbeat
+):
+    location = _resolve_location(provider_id, values.coordinates)
+    try:
+        if location is None:
+            if not await presence.touch(provider_id):
+                raise HTTPException(
+                    status_code=400, detail="coordinates are required to go online"
+                )
+            return responses.SuccessfulResponse()
+        if await presence.heartbeat(provider_id, *location):
+            _record_status(provider_id, True)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error_logger.warning(f"presence heartbeat failed: {e}")
+        raise HTTPException(status_code=503, detail="presence unavailable")
+    return responses.SuccessfulResponse()
+
+
+async def update_online_status(
+    provider_id: UUID, values: service_provider_model.UpdateOnlineStatus
+):
+    if values.online_status:
+        location = _resolve_location(provider_id, values.coordinates)
+        if location is not None:
+            try:
+                await presence.heartbeat(provider_id, *location)
+            except Exception as e:
+                # the durable status below still goes through
+                logger.error_logger.warning(f"presence heartbeat failed: {e}")
+        _record_status(provider_id, True)
+    elif values.online_status is not None:
+        try:
+            await presence.remove(provider_id)
+        except Exception as e:
+            logger.error_logger.warning(f"presence removal failed: {e}")
+        _record_status(provider_id, False)
+    return responses.SuccessfulResponse()
+
+
+async def get_nearby_online_providers(
+    db_conn: db_dependency,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    limit: int,
+) -> list[service_provider_model.NearbyProvider]:
+    try:
+        matches = await presence.nearby(latitude, longitude, radius, limit)
+    except Exception as e:
+        logger.error_logger.warning(f"presence lookup failed, using postgres: {e}")
+        matches = await locations_handler.get_online_providers_nearby(
+            db_conn=db_conn,
+            latitude=latitude,
+            longitude=longitude,
+            radius=radius,
+            limit=limit,
+        )
+    return [
+        service_provider_model.NearbyProvider(id=provider_id, distance=distance)
+        for provider_id, distance in matches
+    ]
+
+
+async def purge_expired_presence():
+    for provider_id in await presence.purge_expired():
+        _record_status(provider_id, False)
+
+
+async def flush_pending_statuses():
+    if not pending_statuses:
+        return
+    statuses = pending_statuses.copy()
+    pending_statuses.clear()
+    try:
+        async with SessionLocal() as db_conn:
+            await service_provider_handler.update_online_statuses(
+                db_conn=db_conn, statuses=statuses
+            )
+    except BaseException:
+        # put them back unless a newer toggle arrived meanwhile; this also
+        # runs when shutdown cancels a flush halfway through the write
+        for provider_id, online_status in statuses.items():
+            pending_statuses.setdefault(provider_id, online_status)
+        raise
+    # cached pages carry online_status and ranked ones weigh it
+    await search_cache.invalidate_providers(statuses)
+
+
+async def flush_presence_periodically(interval: int = PRESENCE_FLUSH_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await purge_expired_presence()
+        except Exception as e:
+            logger.error_logger.warning(f"presence purge failed: {e}")
+        try:
+            await flush_pending_statuses()
+        except Exception as e:
+            logger.error_logger.warning(f"online status write-back failed: {e}")
@@ -4,12 +4,13 @@ from src.database.handlers import user_handler
 from src.custom_exceptions import error
 from fastapi import HTTPException
 from src.services import cloudinary_service
+from src.services.authorization_service import Principal
 from uuid import UUID
 
 
-async def get_user_profile(db_conn: db_dependency, user_id: UUID):
+async def get_user_profile(db_conn: db_dependency, principal: Principal):
     try:
-        user = await user_handler.get_user_by_id(db_conn=db_conn, user_id=user_id)
+        user = await principal.get_user(db_conn=db_conn)
         return user_model.UserProfileResponse.model_validate(user)
     except error.NotFoundError:
         raise HTTPException(status_code=404, detail="user not found")
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+import numpy as np
+
+from src.root.env_settings import env
+
+MAX_RATING = 5.0
+
+
+@dataclass(slots=True, frozen=True)
+class RankingWeights:
+    distance: float = env.RANKING_WEIGHT_DISTANCE
+    rating: float = env.RANKING_WEIGHT_RATING
+    verified: float = env.RANKING_WEIGHT_VERIFIED
+    online: float = env.RANKING_WEIGHT_ONLINE
+    completeness: float = env.RANKING_WEIGHT_COMPLETENESS
+    bookings: float = env.RANKING_WEIGHT_BOOKINGS
+
+    def as_array(self) -> np.ndarray:
+        return np.array(
+            [
+                self.distance,
+                self.rating,
+                self.verified,
+                self.online,
+                self.completeness,
+                self.bookings,
+            ]
+        )
+
+
+@dataclass(slots=True)
+class RankingCandidates:
+    """
+    Column-wise candidate features, one array entry per provider.
+    `distance` is in meters with NaN when unknown; `completeness` is
+    already a 0..1 fraction.
+    """
+
+    ids: list[UUID]
+    match_tiers: np.ndarray
+    distance: np.ndarray
+    rating: np.ndarray
+    verified: np.ndarray
+    online: np.ndarray
+    completeness: np.ndarray
+    bookings: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def score_candidates(
+    candidates: RankingCandidates, radius: float, weights: RankingWeights
+) -> np.ndarray:
+    # every factor is scaled to 0..1 so the weights read as shares
+    proximity = np.nan_to_num(1.0 - candidates.distance / radius, nan=0.0)
+    max_bookings = candidates.bookings.max(initial=0)
+    bookings = (
+        np.log1p(candidates.bookings) / np.log1p(max_bookings)
+        if max_bookings > 0
+        else np.zeros(len(candidates))
+    )
+    features = np.column_stack(
+        (
+            np.clip(proximity, 0.0, 1.0),
+            np.clip(np.nan_to_num(candidates.rating) / MAX_RATING, 0.0, 1.0),
+            candidates.verified,
+            candidates.online,
+            candidates.completeness,
+            bookings,
+        )
+    )
+    return features @ weights.as_array()
+
+
+def _top(
+    indexes: np.ndarray, scores: np.ndarray, ids: list[UUID], limit: int
+) -> list[int]:
+    # partition before sorting so only the page gets fully ordered
+    if len(indexes) > limit:
+        top = indexes[np.argpartition(-scores[indexes], limit - 1)[:limit]]
+        # keep every tie at the cut so the id order below stays exact
+        top = indexes[scores[indexes] >= scores[top].min()]
+    else:
+        top = indexes
+    order = sorted(top.tolist(), key=lambda index: (-scores[index], -ids[index].int))
+    return order[:limit]
+
+
+def rank(
+    candidates: RankingCandidates,
+    radius: float,
+    limit: int,
+    after: tuple[int, float, UUID] | None = None,
+    weights: RankingWeights | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Returns the next page as (candidate index, score). Match tier comes
+    first, so a close location-only provider never beats a category match;
+    within a tier the best score wins and ties fall back to the provider
+    id, matching the (tier, score, id) cursor.
+    """
+    if not len(candidates):
+        return []
+    scores = score_candidates(candidates, radius, weights or RankingWeights())
+    tiers = candidates.match_tiers
+    eligible = np.ones(len(candidates), dtype=bool)
+    if after is not None:
+        after_tier, after_score, after_id = after
+        eligible = (tiers > after_tier) | (
+            (tiers == after_tier) & (scores < after_score)
+        )
+        # exact ties with the cursor row are rare, resolve them by id
+        for index in np.flatnonzero(
+            (tiers == after_tier) & (scores == after_score)
+        ).tolist():
+            eligible[index] = candidates.ids[index].int < after_id.int
+    eligible = np.flatnonzero(eligible)
+
+    page = []
+    for tier in np.unique(tiers[eligible]).tolist():
+        in_tier = eligible[tiers[eligible] == tier]
+        page.extend(_top(in_tier, scores, candidates.ids, limit - len(page)))
+        if len(page) >= limit:
+            break
+    return [(index, float(scores[index])) for index in page]
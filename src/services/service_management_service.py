@@ -1,8 +1,217 @@
-import json
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from uuid import UUID
+
+import orjson
+from cachetools import LRUCache
+from fastapi import HTTPException, Response
+
+from src.custom_exceptions import error
+from src.database.handlers import catalog_handler
 from src.models import service_provider_model
+from src.root import catalog, logger
+from src.root.database import SessionLocal, db_dependency
+from src.services import catalog_matcher
+
+# clients revalidate after this long, so admin edits reach them quickly
+CATALOG_MAX_AGE_SECONDS = 300
+# how often each worker checks for a catalog version bump by another one
+CATALOG_REFRESH_SECONDS = 30
+
+# (since_version, version) -> serialized delta
+delta_cache: LRUCache = LRUCache(maxsize=256)
+
+
+@dataclass(slots=True, frozen=True)
+class SerializedCatalog:
+    body: bytes
+    etag: str
+
+
+def _serialize(content) -> SerializedCatalog:
+    body = orjson.dumps(content.model_dump(mode="json"))
+    # strong validator: it changes whenever a single byte of the body does
+    return SerializedCatalog(
+        body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    )
+
+
+@lru_cache(maxsize=1)
+def get_serialized_catalog() -> SerializedCatalog:
+    """
+    Validates and serializes the catalog once per version; every request
+    after that is served from these bytes.
+    """
+    categories = [
+        {
+            "id": category["id"],
+            "category": category["category"],
+            "services": category["services"],
+        }
+        for category in catalog.load_catalog()
+    ]
+    return _serialize(
+        service_provider_model.AllCategory(
+            category=categories, version=catalog.get_version()
+        )
+    )
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes still match
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _cached_response(
+    serialized: SerializedCatalog, if_none_match: str | None
+) -> Response:
+    headers = {
+        "ETag": serialized.etag,
+        "Cache-Control": f"private, max-age={CATALOG_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(if_none_match, serialized.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=serialized.body, media_type="application/json", headers=headers
+    )
+
+
+def get_all_services(if_none_match: str | None = None) -> Response:
+    return _cached_response(get_serialized_catalog(), if_none_match)
+
+
+async def refresh_catalog(db_conn: db_dependency) -> bool:
+    """
+    Reloads the in-process catalog when the stored version moved on.
+    Returns True when it did.
+    """
+    version = await catalog_handler.get_catalog_version(db_conn=db_conn)
+    if version == catalog.get_version():
+        return False
+    categories = await catalog_handler.get_catalog(db_conn=db_conn)
+    catalog.set_catalog(categories, version)
+    catalog_matcher.get_matcher.cache_clear()
+    catalog_matcher._cached_match.cache_clear()
+    get_serialized_catalog.cache_clear()
+    delta_cache.clear()
+    return True
+
+
+async def sync_catalog(db_conn: db_dependency):
+    # seeds empty catalog tables from the file, then loads them
+    await catalog_handler.seed_catalog(
+        db_conn=db_conn, categories=catalog.read_catalog_file()
+    )
+    await refresh_catalog(db_conn=db_conn)
+
+
+async def refresh_catalog_periodically(interval: int = CATALOG_REFRESH_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with SessionLocal() as db_conn:
+                await refresh_catalog(db_conn=db_conn)
+        except Exception as e:
+            logger.error_logger.warning(f"catalog refresh failed: {e}")
+
+
+async def get_catalog_changes(
+    db_conn: db_dependency, since_version: int, if_none_match: str | None = None
+) -> Response:
+    if since_version > catalog.get_version():
+        # the client synced through a worker that is ahead of this one
+        await refresh_catalog(db_conn=db_conn)
+    version = catalog.get_version()
+    key = (min(since_version, version), version)
+    serialized = delta_cache.get(key)
+    if serialized is None:
+        delta = service_provider_model.CatalogDelta(version=version)
+        if since_version < version:
+            categories, services = await catalog_handler.get_catalog_changes(
+                db_conn=db_conn, since_version=since_version
+            )
+            for category_id, name, deleted in categories:
+                if deleted:
+                    delta.removed_categories.append(category_id)
+                else:
+                    delta.categories.append(
+                        service_provider_model.CatalogCategoryChange(
+                            id=category_id, category=name
+                        )
+                    )
+            for service_id, category_id, name, deleted in services:
+                if deleted:
+                    delta.removed_services.append(service_id)
+                else:
+                    delta.services.append(
+                        service_provider_model.CatalogServiceChange(
+                            id=service_id, category_id=category_id, name=name
+                        )
+                    )
+        serialized = delta_cache[key] = _serialize(delta)
+    return _cached_response(serialized, if_none_match)
+
+
+async def upsert_category(
+    db_conn: db_dependency,
+    category_id: UUID,
+    values: service_provider_model.UpsertCatalogCategory,
+) -> service_provider_model.CatalogDelta:
+    version = await catalog_handler.upsert_category(
+        db_conn=db_conn, category_id=category_id, name=values.category
+    )
+    await refresh_catalog(db_conn=db_conn)
+    return service_provider_model.CatalogDelta(version=version)
+
+
+async def delete_category(
+    db_conn: db_dependency, category_id: UUID
+) -> service_provider_model.CatalogDelta:
+    try:
+        version = await catalog_handler.delete_category(
+            db_conn=db_conn, category_id=category_id
+        )
+    except error.NotFoundError:
+        raise HTTPException(status_code=404, detail="category not found")
+    await refresh_catalog(db_conn=db_conn)
+    return service_provider_model.CatalogDelta(version=version)
+
+
+async def upsert_service(
+    db_conn: db_dependency,
+    service_id: UUID,
+    values: service_provider_model.UpsertCatalogService,
+) -> service_provider_model.CatalogDelta:
+    try:
+        version = await catalog_handler.upsert_service(
+            db_conn=db_conn,
+            service_id=service_id,
+            category_id=values.category_id,
+            name=values.name,
+        )
+    except error.NotFoundError:
+        raise HTTPException(status_code=404, detail="category not found")
+    await refresh_catalog(db_conn=db_conn)
+    return service_provider_model.CatalogDelta(version=version)
 
 
-def get_all_services():
-    with open("services2.json", "r") as file:
-        data = json.load(file)
-    return service_provider_model.AllCategory(category=data)
+async def delete_service(
+    db_conn: db_dependency, service_id: UUID
+) -> service_provider_model.CatalogDelta:
+    try:
+        version = await catalog_handler.delete_service(
+            db_conn=db_conn, service_id=service_id
+        )
+    except error.NotFoundError:
+        raise HTTPException(status_code=404, detail="service not found")
+    await refresh_catalog(db_conn=db_conn)
+    return service_provider_model.CatalogDelta(version=version)
@@ -1,17 +1,33 @@
+import asyncio
+import base64
 import uuid
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
+import numpy as np
+import orjson
 from fastapi import HTTPException, UploadFile
 from src.models import responses
 from src.database.handlers import bookings_handler
 from src.models.user_model import ServiceProfileResponse
 from src.database.handlers import service_provider_handler, user_handler
-from src.root.database import db_dependency
+from src.root.database import SessionLocal, db_dependency
+from src.root import logger
+from src.database import search_cache, search_index, search_index_sync
 from src.database.handlers import locations_handler
 from src.models import service_provider_model
-from src.services import cloudinary_service
+from src.services import cloudinary_service, search_ranking
 from src.custom_exceptions import error
-from src.models import bookings_model
+from src.models import bookings_model, orm_models
+
+SEARCH_INDEX_REFRESH_SECONDS = 300
+# candidates scored per ranked search, nearest and best-tier first
+RANKING_POOL_SIZE = 5000
+# category-only candidates are drawn from this many radii around the point,
+# up to RANKING_POOL_MAX_RADIUS meters
+RANKING_POOL_RADIUS_FACTOR = 5
+RANKING_POOL_MAX_RADIUS = 50000
+RECENT_BOOKINGS_DAYS = 30
 
 
 async def create_service_provider(
@@ -41,14 +57,248 @@ async def create_service_provider(
     return created_service_provider
 
 
+async def build_search_index(db_conn: db_dependency):
+    rows = await locations_handler.get_provider_index_rows(db_conn=db_conn)
+    search_index.provider_index.load(rows)
+
+
+async def reload_search_index():
+    async with SessionLocal() as db_conn:
+        await build_search_index(db_conn=db_conn)
+
+
+async def refresh_search_index_periodically(
+    interval: int = SEARCH_INDEX_REFRESH_SECONDS,
+):
+    # changes reach other workers through search_index_sync; the reload
+    # catches whatever bypasses it, such as cascade deletes
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_search_index()
+        except Exception as e:
+            logger.error_logger.warning(f"search index refresh failed: {e}")
+
+
+def _encode_search_cursor(
+    service_provider: orm_models.ServiceProviderSearchTableModel,
+    scored: bool = False,
+    ranked: bool = False,
+) -> str:
+    # text searches page on (score, id), ranked ones on (tier, score, id)
+    if ranked:
+        key = [
+            service_provider.match_tier,
+            service_provider.rank,
+            str(service_provider.id),
+        ]
+    elif scored:
+        key = [service_provider.rank, str(service_provider.id)]
+    else:
+        key = [
+            service_provider.match_tier,
+            service_provider.distance,
+            str(service_provider.id),
+        ]
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode().rstrip("=")
+
+
+def _decode_search_cursor(
+    cursor: str, scored: bool = False, ranked: bool = False
+) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = orjson.loads(base64.urlsafe_b64decode(padded))
+        if ranked:
+            tier, score, service_provider_id = key
+            return int(tier), float(score), UUID(service_provider_id)
+        if scored:
+            score, service_provider_id = key
+            return float(score), UUID(service_provider_id)
+        tier, distance, service_provider_id = key
+        distance = (
+            locations_handler.UNKNOWN_DISTANCE if distance is None else float(distance)
+        )
+        return int(tier), distance, UUID(service_provider_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid search cursor")
+
+
 async def search_service_providers_by_location_and_category(
     db_conn: db_dependency, search_query: service_provider_model.SearchServices
 ):
-    service_providers = await locations_handler.search_service_providers_by_radius(
-        db_conn=db_conn, search_query=search_query
+    text_search = search_query.query is not None
+    ranked = not text_search and search_query.sort == "ranked"
+    scored = text_search or ranked
+    after = (
+        _decode_search_cursor(search_query.cursor, scored=scored, ranked=ranked)
+        if search_query.cursor
+        else None
+    )
+    latitude = longitude = None
+    if (
+        search_query.coordinates is not None
+        and search_query.coordinates.latitude is not None
+        and search_query.coordinates.longitude is not None
+    ):
+        latitude = search_query.coordinates.latitude
+        longitude = search_query.coordinates.longitude
+    cache_key = search_cache.search_key(
+        latitude=latitude,
+        longitude=longitude,
+        categories=search_query.category,
+        radius=search_query.radius,
+        page=f"{search_query.sort}:{search_query.limit}:{search_query.cursor or ''}",
+        query=search_query.query,
     )
+    cached = await search_cache.get_results(cache_key)
+    if cached is not None:
+        return service_provider_model.ServiceProviderSearchPage.model_validate_json(
+            cached
+        )
 
-    return service_providers
+    if text_search:
+        service_providers = await locations_handler.search_service_providers_by_text(
+            db_conn=db_conn, search_query=search_query, after=after
+        )
+    elif ranked:
+        service_providers = await _rank_service_providers(
+            db_conn=db_conn, search_query=search_query, after=after
+        )
+    else:
+        service_providers = await _search_service_providers(
+            db_conn=db_conn, search_query=search_query, after=after
+        )
+    page = service_provider_model.ServiceProviderSearchPage(
+        results=service_providers,
+        next_cursor=(
+            _encode_search_cursor(service_providers[-1], scored=scored, ranked=ranked)
+            if len(service_providers) == search_query.limit
+            else None
+        ),
+    )
+    await search_cache.store_results(
+        cache_key,
+        page.model_dump_json().encode(),
+        latitude=latitude,
+        longitude=longitude,
+        radius=search_query.radius,
+        global_dependency=any(
+            provider.match_tier == 1 for provider in service_providers
+        ),
+    )
+    return page
+
+
+async def _search_service_providers(
+    db_conn: db_dependency,
+    search_query: service_provider_model.SearchServices,
+    after: tuple[int, float, UUID] | None,
+):
+    if search_query.coordinates is not None:
+        matches = search_index.provider_index.search(
+            latitude=search_query.coordinates.latitude,
+            longitude=search_query.coordinates.longitude,
+            radius=search_query.radius,
+            categories=search_query.category,
+            limit=search_query.limit,
+            after=after,
+        )
+        if matches is not None:
+            # hydrate only the final page from postgres
+            service_providers = (
+                await service_provider_handler.get_service_providers_by_ids(
+                    db_conn=db_conn,
+                    service_provider_ids=[match.provider_id for match in matches],
+                )
+            )
+            missing = [
+                match.provider_id
+                for match in matches
+                if match.provider_id not in service_providers
+            ]
+            if not missing:
+                # one row per match, so the page and its cursor are the index's
+                return [
+                    orm_models.ServiceProviderSearchTableModel(
+                        **service_providers[match.provider_id].model_dump(),
+                        match_tier=match.match_tier,
+                        distance=match.distance,
+                    )
+                    for match in matches
+                ]
+            # the index still holds providers postgres no longer has, e.g.
+            # after a cascade delete; a short page would end pagination, so
+            # drop them and let postgis answer this one
+            for provider_id in missing:
+                await search_index_sync.remove(provider_id)
+
+    return await locations_handler.search_service_providers_by_radius(
+        db_conn=db_conn, search_query=search_query, after=after
+    )
+
+
+async def _rank_service_providers(
+    db_conn: db_dependency,
+    search_query: service_provider_model.SearchServices,
+    after: tuple[int, float, UUID] | None,
+):
+    rows = await locations_handler.get_ranking_candidates(
+        db_conn=db_conn,
+        search_query=search_query,
+        limit=RANKING_POOL_SIZE,
+        pool_radius=min(
+            search_query.radius * RANKING_POOL_RADIUS_FACTOR, RANKING_POOL_MAX_RADIUS
+        ),
+    )
+    # a provider with several locations keeps its best row
+    seen = set()
+    rows = [row for row in rows if not (row.id in seen or seen.add(row.id))]
+    if not rows:
+        return []
+    ids, tiers, distances, ratings, verified, online, completeness = zip(*rows)
+    recent_bookings = await bookings_handler.count_recent_bookings(
+        db_conn=db_conn,
+        service_provider_ids=list(ids),
+        since=datetime.now(timezone.utc) - timedelta(days=RECENT_BOOKINGS_DAYS),
+    )
+    candidates = search_ranking.RankingCandidates(
+        ids=list(ids),
+        match_tiers=np.array(tiers),
+        distance=np.array(distances, dtype=float),
+        rating=np.array(ratings, dtype=float),
+        verified=np.array(verified, dtype=bool).astype(float),
+        online=np.array([bool(status) for status in online], dtype=float),
+        completeness=np.array(completeness, dtype=float),
+        bookings=np.array(
+            [recent_bookings.get(provider_id, 0) for provider_id in ids], dtype=float
+        ),
+    )
+    page = search_ranking.rank(
+        candidates, radius=search_query.radius, limit=search_query.limit, after=after
+    )
+
+    service_providers = await service_provider_handler.get_service_providers_by_ids(
+        db_conn=db_conn, service_provider_ids=[ids[index] for index, _ in page]
+    )
+    return [
+        orm_models.ServiceProviderSearchTableModel(
+            **service_providers[ids[index]].model_dump(),
+            match_tier=int(candidates.match_tiers[index]),
+            distance=(
+                None
+                if np.isnan(candidates.distance[index])
+                else float(candidates.distance[index])
+            ),
+            rank=score,
+        )
+        for index, score in page
+        if ids[index] in service_providers
+    ]
+
+
+def get_search_cache_stats():
+    return search_cache.get_stats()
 
 
 async def upload_pictures(catalogue: list[UploadFile]):
@@ -142,19 +392,6 @@ async def update_verified_status(
         raise HTTPException(status_code=404, detail="service provider not found")
 
 
-async def update_online_status(
-    db_conn: db_dependency,
-    service_provider_id: UUID,
-    values: service_provider_model.UpdateOnlineStatus,
-):
-    updates = service_provider_model.UpdateServiceProvider.model_validate(values)
-    print(updates)
-    _ = await service_provider_handler.update_service_by_id(
-        db_conn=db_conn, service_id=service_provider_id, values=updates
-    )
-    return responses.SuccessfulResponse()
-
-
 async def update_service_provider_by_id(
     db_conn: db_dependency,
     service_provider_id: UUID,
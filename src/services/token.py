@@ -1,3 +1,5 @@
+import hashlib
+import time
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
 from typing import Any
@@ -6,13 +8,16 @@ from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError, ExpiredSignatureError
 from itsdangerous import URLSafeSerializer
+from cachetools import TLRUCache
 
 # from src.models.orm_models import UserTableModel
 from src.models.orm_models import UserTableModel
 from src.models.token_models import (
+    AccessTokenData,
     AccessTokenEncode,
     RefreshTokenDataEncode,
     RefreshTokenData,
+    RefreshTokenResponse,
     TokenType,
 )
 from src.models.user_model import UpdateUserProfile
@@ -21,6 +26,7 @@ from datetime import timedelta
 
 # from backend.src.root.logger import logger
 from src.root.database import db_dependency
+from src.database import sessions
 from src.database.handlers import user_handler
 from src.custom_exceptions.error import (
     NotFoundError,
@@ -37,6 +43,17 @@ ACCESS_SECRET_KEY = env.ACCESS_SECRET_KEY
 REFRESH_SECRET_KEY = env.REFRESH_SECRET_KEY
 TOKEN_WRAPPER_KEY = env.TOKEN_WRAPPER_KEY
 TOKEN_WRAPPER_SALT = env.TOKEN_WRAPPER_SALT
+ACCESS_TOKEN_CACHE_SIZE = 10000
+
+serializer = URLSafeSerializer(secret_key=TOKEN_WRAPPER_KEY, salt=TOKEN_WRAPPER_SALT)
+
+# sha256(token) -> (AccessTokenData, exp); each entry lives until its token
+# expires, so a client repeating its token skips both signature checks
+access_token_cache = TLRUCache(
+    maxsize=ACCESS_TOKEN_CACHE_SIZE,
+    ttu=lambda _key, value, _now: value[1],
+    timer=time.time,
+)
 
 
 def __create_token(token_data: dict, expires_delta: timedelta, key: str) -> str:
@@ -44,9 +61,6 @@ def __create_token(token_data: dict, expires_delta: timedelta, key: str) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, key, ALGORITHM)
-    serializer = URLSafeSerializer(
-        secret_key=TOKEN_WRAPPER_KEY, salt=TOKEN_WRAPPER_SALT
-    )
     token = serializer.dumps(encoded_jwt)
 
     return token  # type: ignore
@@ -55,9 +69,6 @@ def __create_token(token_data: dict, expires_delta: timedelta, key: str) -> str:
 def __decode_token(
     token: str, algorithm: str, key: str, token_type: TokenType
 ) -> dict[str, Any]:
-    serializer = URLSafeSerializer(
-        secret_key=TOKEN_WRAPPER_KEY, salt=TOKEN_WRAPPER_SALT
-    )
     try:
         token = serializer.loads(token)
 
@@ -126,6 +137,55 @@ def verify_access_token(token: str):
         ) from e
 
 
+def get_access_token_data(token: str) -> AccessTokenData:
+    key = hashlib.sha256(token.encode()).digest()
+    cached = access_token_cache.get(key)
+    if cached is not None:
+        return cached[0]
+    payload = verify_access_token(token)
+    token_data = AccessTokenData.model_validate(payload)
+    access_token_cache[key] = (token_data, payload["exp"])
+    return token_data
+
+
+def encode_refresh_token(
+    token_data: RefreshTokenDataEncode,
+    expires_delta=timedelta(minutes=REFRESH_TOKEN_EXPIRES),
+) -> str:
+    return __create_token(
+        token_data=token_data.model_dump(),
+        expires_delta=expires_delta,
+        key=REFRESH_SECRET_KEY,
+    )
+
+
+async def issue_refresh_token(
+    token_data: RefreshTokenDataEncode,
+    expires_delta=timedelta(minutes=REFRESH_TOKEN_EXPIRES),
+    db_conn: db_dependency | None = None,
+    stored: bool = False,
+) -> str:
+    """
+    Opens a session for the token's jit and encodes the token. Without
+    redis the jit is written to users.token_jit instead when `db_conn` is
+    given, so the postgres fallback still accepts it. `stored` marks a jit
+    the caller already wrote to users.token_jit.
+    """
+    try:
+        await sessions.create(
+            UUID(token_data.id), UUID(token_data.token_jit), stored=stored
+        )
+    except Exception as e:
+        logger.error_logger.warning(f"session store unavailable: {e}")
+        if db_conn is not None:
+            await user_handler.update_user_by_id(
+                db_conn=db_conn,
+                user_id=UUID(token_data.id),
+                values=UpdateUserProfile(token_jit=token_data.token_jit),
+            )
+    return encode_refresh_token(token_data, expires_delta=expires_delta)
+
+
 async def create_refresh_token(
     user_id: UUID,
     db_conn: db_dependency,
@@ -138,10 +198,8 @@ async def create_refresh_token(
             user_id=user_id, values=updated_model, db_conn=db_conn
         )
         token_model = RefreshTokenDataEncode.model_validate(user_data)
-        return __create_token(
-            token_data=token_model.model_dump(),
-            expires_delta=expires_delta,
-            key=REFRESH_SECRET_KEY,
+        return await issue_refresh_token(
+            token_model, expires_delta=expires_delta, stored=True
         )
     except NotFoundError as e:
         raise HTTPException(
@@ -164,27 +222,100 @@ async def decode_refresh_token(token: str, algorithm=ALGORITHM) -> RefreshTokenD
     return RefreshTokenData.model_validate(token_data)
 
 
-async def verify_refresh_token(db_conn: db_dependency, token: str) -> RefreshTokenData:
-    user_data = await decode_refresh_token(token=token)
-    token_model = RefreshTokenData.model_validate(user_data)
+async def _session_state(
+    token_model: RefreshTokenData, consume: bool
+) -> tuple[bool | None, bool]:
+    # (live, jit also in users.token_jit); live is None when redis does not
+    # know the jit or is unavailable
     try:
-        user_data = await user_handler.get_user_by_id(
-            user_id=token_model.id, db_conn=db_conn
-        )
-        if user_data.token_jit != token_model.token_jit:  # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="invalid refresh token",
-                headers={"WWW-Authenticate": "Bearer"},
+        if consume:
+            state = await sessions.consume(token_model.id, token_model.token_jit)
+            if state is None:
+                return None, False
+            return state in sessions.LIVE_STATES, state == sessions.LIVE_STORED
+        return await sessions.check(token_model.id, token_model.token_jit), False
+    except Exception as e:
+        logger.error_logger.warning(f"session store unavailable: {e}")
+        return None, False
+
+
+async def verify_refresh_token(
+    db_conn: db_dependency, token: str, consume: bool = False
+) -> RefreshTokenData:
+    """
+    Checks the token's session in redis. Postgres is only read when redis
+    does not know the jit, for tokens issued before the session store or
+    after redis lost its data. With `consume` the session is used up in
+    both stores.
+    """
+    token_model = await decode_refresh_token(token=token)
+    state = None
+    if token_model.token_jit is not None:
+        state, stored = await _session_state(token_model, consume=consume)
+        if state is None:
+            try:
+                user_data = await user_handler.get_user_by_id(
+                    user_id=token_model.id, db_conn=db_conn
+                )
+            except NotFoundError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found",
+                )
+            state = user_data.token_jit == token_model.token_jit
+            if state and consume:
+                # clearing the jit claims it, so racing refreshes cannot
+                # both get through the fallback
+                state = await user_handler.clear_token_jit(
+                    db_conn=db_conn,
+                    user_id=token_model.id,
+                    token_jit=token_model.token_jit,
+                )
+                try:
+                    await sessions.revoke(token_model.id, token_model.token_jit)
+                except Exception as e:
+                    logger.error_logger.warning(f"session store unavailable: {e}")
+        elif state and stored:
+            # redis may lose the tombstone later; the postgres fallback must
+            # not accept the login jit again either. Rotated jits never
+            # reach postgres, so they skip the write.
+            await user_handler.clear_token_jit(
+                db_conn=db_conn,
+                user_id=token_model.id,
+                token_jit=token_model.token_jit,
             )
 
-        return token_model
-
-    except NotFoundError as e:
+    if not state:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
         )
+    return token_model
+
+
+async def refresh_tokens(db_conn: db_dependency, token: str) -> RefreshTokenResponse:
+    # rotation: the presented token is used up, a new session replaces it
+    token_model = await verify_refresh_token(db_conn=db_conn, token=token, consume=True)
+    access_token = create_access_token(
+        AccessTokenEncode(
+            id=token_model.id,
+            is_active=token_model.is_active,
+            role=token_model.role,
+            service_provider_id=token_model.service_provider_id,
+        ).model_dump()
+    )
+    refresh_token = await issue_refresh_token(
+        RefreshTokenDataEncode(
+            id=token_model.id,
+            is_active=token_model.is_active,
+            role=token_model.role,
+            service_provider_id=token_model.service_provider_id,
+            token_jit=str(uuid4()),
+        ),
+        db_conn=db_conn,
+    )
+    return RefreshTokenResponse(access_token=access_token, refresh_token=refresh_token)
 
 
 async def generate_access_and_refresh_tokens(